@@ -2,10 +2,8 @@
 import time
 import subprocess
 import requests
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from PIL import Image, ImageOps
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import io
 import os
 import sys
@@ -37,10 +35,13 @@ except Exception as e:
 # =============================================================
 
 # === CONFIG ===
-HOST_URL = "http://192.168.50.150:5000/"
+HOST_URL = os.environ.get("DASHBOARD_HOST_URL", "http://192.168.50.150:5000/")
+FRAME_URL = f"{HOST_URL}api/frame.raw"
 IMAGE_WIDTH = 1872
 IMAGE_HEIGHT = 1404
 IMAGE_PATH = "/tmp/dashboard.raw"
+FRAME_HASH_PATH = "/tmp/dashboard.hash"  # Content hash of the frame currently on the panel
+DIRTY_RECTS_PATH = "/tmp/dashboard.dirty"  # Regions the driver should partially refresh ("full" = everything)
 
 # === MOSFET Control Configuration ===
 EINK_POWER_PIN = 17  # BCM pin number for MOSFET control (e.g., GPIO17)
@@ -48,6 +49,24 @@ EINK_POWER_PIN = 17  # BCM pin number for MOSFET control (e.g., GPIO17)
 
 # ====================================
 
+# One keep-alive connection to the host for the whole wake cycle (status check, battery, frame).
+# Connection errors and 502/503/504 are retried with backoff, since the Pi often wakes before Wi-Fi settles
+# (POST included: reporting the same battery level twice is harmless).
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=Retry(
+    total=3, connect=3, read=1, status=2, backoff_factor=1.0, status_forcelist=(502, 503, 504),
+    allowed_methods=frozenset({"GET", "HEAD", "POST"}), raise_on_status=False)))
+
+
+def _timed(method, url, **kwargs):
+    """Sends a request on the shared session and logs how long it took (including retries)."""
+    start = time.perf_counter()
+    try:
+        return _session.request(method, url, **kwargs)
+    finally:
+        print(f"[client] {method} {url} took {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
 def get_battery_level():
     if not pijuice:
         return None
@@ -64,7 +83,7 @@ def report_battery_to_server(level):
     if level is None: return
     try:
         print(f"[client] Reporting battery level ({level}%) to server...")
-        requests.post(f"{HOST_URL}api/battery", json={"level": level}, timeout=5)
+        _timed("POST", f"{HOST_URL}api/battery", json={"level": level}, timeout=5)
     except Exception as e:
         print(f"[client] Failed to report battery level: {e}")
 
@@ -73,7 +92,7 @@ def check_server_connection(url):
     """Checks if the server is reachable before launching the heavy browser."""
     try:
         print(f"[client] Checking server status at {url}...")
-        r = requests.get(url, timeout=10)
+        r = _timed("GET", url, timeout=10)
         if r.status_code == 200:
             print("[client] Server is up and reachable.")
             return True
@@ -86,7 +105,57 @@ def check_server_connection(url):
         return False
 
 
+def fetch_frame(url, width, height, out_path):
+    """Downloads the host-rendered raw frame and writes it where the display driver expects it.
+
+    Returns (success, changed). When the host reports the frame we already show is current,
+    nothing is written and changed is False so the panel can stay powered off.
+    """
+    headers = {}
+    if os.path.exists(out_path) and os.path.exists(FRAME_HASH_PATH):
+        with open(FRAME_HASH_PATH) as f:
+            headers["If-None-Match"] = f'"{f.read().strip()}"'
+
+    try:
+        print(f"[client] Fetching pre-rendered frame from {url}...")
+        r = _timed("GET", url, headers=headers, timeout=90)
+        if r.status_code == 304:
+            print("[client] Frame unchanged since last refresh.")
+            return True, False
+        if r.status_code != 200:
+            print(f"[client] Frame endpoint returned status code: {r.status_code}")
+            return False, False
+
+        data = r.content
+        if len(data) != width * height:
+            print(f"[client] Unexpected frame size: {len(data)} bytes (expected {width * height}).")
+            return False, False
+
+        # Write then rename so the driver never sees a half-written frame
+        tmp_path = out_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, out_path)
+
+        dirty = r.headers.get("X-Dirty-Rects", "full")
+        with open(DIRTY_RECTS_PATH, "w") as f:
+            f.write(dirty)
+        with open(FRAME_HASH_PATH, "w") as f:
+            f.write(r.headers.get("ETag", "").strip('"'))
+        print(f"[client] Saved frame to {out_path} (dirty: {dirty if len(dirty) < 80 else dirty[:80] + '...'}).")
+        return True, True
+    except requests.exceptions.RequestException as e:
+        print(f"[client] Frame download failed: {e}")
+        return False, False
+
+
 def render_site_to_image(url, width, height, out_path):
+    """Fallback: renders the page locally with Chromium. Only used if the host cannot render the frame."""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    from PIL import Image, ImageOps
+
     print("[client] Setting up Chrome options...")
     chrome_options = Options()
     chrome_options.add_argument("--headless")
@@ -197,11 +266,21 @@ def main():
     else:
         print("[client] Could not read battery level.")
 
-    # 3. Render site
+    # 3. Fetch the host-rendered frame, falling back to rendering locally
     print("[client] Starting rendering process...")
     render_successful = False
+    frame_changed = True
     try:
-        render_successful = render_site_to_image(HOST_URL, IMAGE_WIDTH, IMAGE_HEIGHT, IMAGE_PATH)
+        render_successful, frame_changed = fetch_frame(FRAME_URL, IMAGE_WIDTH, IMAGE_HEIGHT, IMAGE_PATH)
+        if not render_successful:
+            print("[client] Host frame unavailable, rendering locally...")
+            render_successful = render_site_to_image(HOST_URL, IMAGE_WIDTH, IMAGE_HEIGHT, IMAGE_PATH)
+            frame_changed = True
+            # A local render is not what the host hashed; refresh fully now and next time
+            if os.path.exists(FRAME_HASH_PATH):
+                os.remove(FRAME_HASH_PATH)
+            with open(DIRTY_RECTS_PATH, "w") as f:
+                f.write("full")
         if render_successful:
             print("[client] Image rendering successful.")
         else:
@@ -209,8 +288,10 @@ def main():
     except Exception as e:
         print(f"[client] An unexpected error occurred: {e}")
 
-    # 4. Turn on E-ink
-    if gpio_initialized_successfully:
+    # 4. Turn on E-ink (skipped entirely when the panel already shows this frame)
+    if not frame_changed:
+        print("[client] Display is up to date; leaving e-ink power off.")
+    elif gpio_initialized_successfully:
         print("[client] Proceeding to turn on MOSFET for e-ink display.")
         power_mosfet_on()
     else:
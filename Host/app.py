@@ -1,20 +1,50 @@
 #!/usr/bin/env python3
 # app.py - Main Flask app for Raspberry Pi Dashboard
-import os, json, threading, time, argparse, sys, glob
+import startup  # First, so the startup profile measures from process start
+import os, json, time, argparse, sys, glob, hashlib, functools
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date, timedelta
-import schedule
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, Response, jsonify, render_template, request
 
-# Import modules
-from fidelity import FidelityAutomation
+# Import modules. Providers pull in Playwright, googleapiclient, bs4 etc. and load on first use,
+# so the server comes up without paying for them.
+fidelity = startup.lazy_import("fidelity")
+browser_manager_module = startup.lazy_import("browser_manager")
 # Robinhood import removed
-from weather import get_chicago_weekly
-from google_calendar import get_events_surrounding_days, get_upcoming_events, create_reminder_event
-from health import get_weekly_health_summary
-from news import get_political_news
+weather = startup.lazy_import("weather")
+google_calendar = startup.lazy_import("google_calendar")
+health = startup.lazy_import("health")
+news = startup.lazy_import("news")
+frame = startup.lazy_import("frame")
+http_client = startup.lazy_import("http_client")
+from cache import TTLCache
+from state_store import StateStore
+import datastore
+from jobs import JobExecutor
+from scheduler import create_scheduler, schedule_jobs, describe_jobs
+startup.mark("core modules imported")
+
+app = Flask(__name__, static_url_path="/static")
 
 CONFIG = "config.json"
 STATE = "state.json"
+LEGACY_NETWORTH_HISTORY = "networth_history.bin"  # Imported into the datastore once, then unused
+LEGACY_IMPORT_MARKER = "legacy_state_imported"  # datastore meta key set once the import has run
+PORT = 5000
+
+# Upstream-backed panels are served from memory; stale entries refresh in the background
+CALENDAR_TTL_SECONDS = 10 * 60
+NEWS_TTL_SECONDS = 30 * 60
+STALE_TTL_SECONDS = 24 * 60 * 60
+# History (net worth snapshots, holdings, health days, forecasts) and the upstream cache live in
+# SQLite; state.json only keeps the scalar UI state
+store = datastore.get_store()
+upstream_cache = TTLCache(max_size=32, name="upstream_cache", backing=store)
+
+# Refresh jobs run side by side; a slow source only delays itself
+FIDELITY_TIMEOUT_SECONDS = 8 * 60
+JOB_TIMEOUTS = {"weather": 60, "health": 5 * 60, "net_worth": 10 * 60}
+jobs = JobExecutor(max_workers=len(JOB_TIMEOUTS))
 
 
 def load_cfg():
@@ -25,18 +55,13 @@ def load_cfg():
         return json.load(f)
 
 
-def save_state():
-    with open(STATE, "w") as f:
-        json.dump(state, f, indent=2)
-
-
 def manual_login_flow():
     print("Launching browser for manual FIDELITY login...")
     cfg = config.get("fidelity", {})
     if not cfg:
         print("Error: Fidelity config missing.")
         return
-    bot = FidelityAutomation(headless=False, debug=False, save_state=True)
+    bot = fidelity.FidelityAutomation(headless=False, debug=False, save_state=True)
     bot.page.goto("https://digital.fidelity.com/prgw/digital/login/full-page", timeout=600000)
     input("After logging in and seeing your account summary, press Enter here to save session and exit...")
     bot.save_storage_state()
@@ -83,6 +108,23 @@ def clean_pickles():
     sys.exit(0)
 
 
+def _fetch_fidelity_portfolio(context, cfg):
+    """Runs on the warm browser's thread: logs in (usually a no-op thanks to the saved session)
+    and scrapes the portfolio in a fresh page of the shared context."""
+    bot = fidelity.FidelityAutomation(headless=True, debug=False, save_state=True, context=context)
+    try:
+        need_pw, need_2fa = bot.login(cfg["username"], cfg["password"], save_device=True,
+                                      totp_secret=cfg.get("totp_secret"))
+        if not need_pw and not need_2fa:
+            raise Exception("Fidelity password error")
+        if not need_2fa:
+            print("[fetch] Fidelity requesting manual 2FA in headless mode - skipping.")
+            return {}
+        return bot.get_detailed_portfolio()
+    finally:
+        bot.close_browser()
+
+
 def fetch_net_worth():
     print("[fetch] Updating account balances and details…")
     try:
@@ -93,16 +135,8 @@ def fetch_net_worth():
             print("[fetch] Skipping Fidelity (no config)")
         else:
             try:
-                bot = FidelityAutomation(headless=True, debug=False, save_state=True)
-                need_pw, need_2fa = bot.login(cfg["username"], cfg["password"], save_device=True,
-                                              totp_secret=cfg.get("totp_secret"))
-                if not need_pw and not need_2fa:
-                    raise Exception("Fidelity password error")
-                if not need_2fa:
-                    print("[fetch] Fidelity requesting manual 2FA in headless mode - skipping.")
-                else:
-                    fidelity_data = bot.get_detailed_portfolio()
-                bot.close_browser()
+                fidelity_data = get_browser_manager().run(lambda context: _fetch_fidelity_portfolio(context, cfg),
+                                                          timeout=FIDELITY_TIMEOUT_SECONDS)
             except Exception as e:
                 print(f"[fetch] Fidelity Error: {e}")
                 pass
@@ -118,71 +152,77 @@ def fetch_net_worth():
         }
 
         today_iso = date.today().isoformat()
-        net_worth_from_last_run = state.get("net_worth")
+        current = state.snapshot()
+        net_worth_from_last_run = current.get("net_worth")
+        yesterday = current.get("yesterday")
 
-        if state.get("stamp") != today_iso:
+        if current.get("stamp") != today_iso:
             if net_worth_from_last_run is not None:
-                state["yesterday"] = net_worth_from_last_run
+                yesterday = net_worth_from_last_run
             else:
-                state["yesterday"] = total_nw
-        elif state.get("yesterday") is None:
-            state["yesterday"] = total_nw
-
-        state["net_worth"] = total_nw
-        state["portfolio_details"] = portfolio_details
-        state["last_updated"] = datetime.now().strftime("%Y-%m-%d %I:%M %p")
-        state["error"] = False
-        state["stamp"] = today_iso
-        save_state()
-
-        yesterday_nw_for_log = state.get("yesterday")
+                yesterday = total_nw
+        elif yesterday is None:
+            yesterday = total_nw
+
+        if fidelity_data:
+            # Before the state update, so views rebuilt for the new version read the new holdings.
+            # The snapshot also feeds /api/networth/history.
+            store.record_portfolio(total_nw, portfolio_details).result()
+
+        state.update({
+            "yesterday": yesterday,
+            "net_worth": total_nw,
+            "last_updated": datetime.now().strftime("%Y-%m-%d %I:%M %p"),
+            "error": False,
+            "stamp": today_iso,
+        })
+
+        yesterday_nw_for_log = yesterday
         actual_delta_for_log = total_nw - (yesterday_nw_for_log if yesterday_nw_for_log else total_nw)
 
         print(f"[fetch] Success – Net Worth ${total_nw:,.2f} (Δ {actual_delta_for_log:+,.2f} vs yesterday)")
 
     except Exception as e:
         print(f"Fetch error: {e}")
-        state["error"] = True
-        state["last_updated"] = datetime.now().strftime("%Y-%m-%d %I:%M %p")
-        save_state()
+        state.update({"error": True, "last_updated": datetime.now().strftime("%Y-%m-%d %I:%M %p")})
 
 
 def update_health_state():
     print("[health_state] Updating health stats...")
     try:
-        health_summary = get_weekly_health_summary()
+        health_summary = health.get_weekly_health_summary(
+            history_days=config.get("health_history_days", health.DEFAULT_HISTORY_DAYS_TO_KEEP))
         state["health_stats"] = health_summary
-        save_state()
         print("[health_state] Successfully updated health stats.")
     except Exception as e:
         print(f"[health_state] Error updating health state: {e}")
         state["health_stats"] = None
-        save_state()
 
 
 def reschedule():
-    schedule.clear()
-    for hr in config.get("refresh_hours", []):
-        schedule.every().day.at(f"{int(hr):02d}:00").do(fetch_net_worth)
-    schedule.every(1).hours.do(update_weather_state)
-    schedule.every(6).hours.do(periodic_update)
-    print("[scheduler] Jobs:", schedule.jobs)
+    schedule_jobs(scheduler, config, run_job, periodic_update)
+    print("[scheduler] Jobs:", [f"{j['id']} next {j['next_run']}" for j in describe_jobs(scheduler, {})])
 
 
 def update_weather_state():
     print("[weather_state] Updating weather state...")
     try:
-        new_7day_forecast_data = get_chicago_weekly()
+        new_7day_forecast_data = weather.get_chicago_weekly()
         if not new_7day_forecast_data: return
 
-        today_iso = date.today().isoformat()
-        state["weather_forecast"] = new_7day_forecast_data
-        state["weather_stamp"] = today_iso
-        save_state()
+        store.put_forecast(new_7day_forecast_data).result()
+        state["weather_stamp"] = date.today().isoformat()
     except Exception as e:
         print(f"[weather_state] Error: {e}")
 
 
+@functools.lru_cache(maxsize=None)
+def get_browser_manager():
+    """One Firefox instance kept warm across scheduled Fidelity refreshes."""
+    return browser_manager_module.BrowserManager(storage_state_path=fidelity.fidelity_profile_path(),
+                                                 idle_minutes=config.get("browser_idle_minutes", 30))
+
+
 config = load_cfg()
 default_state = dict(
     net_worth=None,
@@ -190,30 +230,91 @@ default_state = dict(
     last_updated=None,
     error=False,
     stamp=None,
-    weather_history=[None, None],
-    weather_forecast=[],
     weather_stamp=None,
     health_stats=None,
-    portfolio_details=None,
     battery=None
     # Robinhood state keys removed
 )
-state = default_state.copy()
 
-if os.path.exists(STATE):
+
+def _legacy_portfolio_ts(legacy: dict, snapshots: list):
+    """When state.json's portfolio was fetched. The newest history snapshot with the same total
+    came from the same fetch and is taken out of snapshots, since state.json's copy also has each
+    holding's gain; otherwise last_updated (set on success) or the day in stamp is used."""
+    total = legacy["portfolio_details"].get("total_value")
+    if snapshots and snapshots[-1][1] == total:
+        return snapshots.pop()[0]
     try:
-        with open(STATE) as f:
-            loaded_state = json.load(f)
-        for key, default_value in default_state.items():
-            state[key] = loaded_state.get(key, default_value)
-    except Exception as e:
-        print(f"[State Error] Failed to load {STATE}: {e}")
+        if not legacy.get("error") and legacy.get("last_updated"):
+            return datetime.strptime(legacy["last_updated"], "%Y-%m-%d %I:%M %p").timestamp()
+        if legacy.get("stamp"):
+            return datetime.fromisoformat(legacy["stamp"]).timestamp()
+    except ValueError:
+        pass
+    return None
+
+
+def import_legacy_state():
+    """Moves the net worth history (networth_history.bin) and the portfolio and forecast that older
+    versions kept in state.json into the datastore, once."""
+    if store.get_meta(LEGACY_IMPORT_MARKER):
+        return
+    # Databases from before the marker may already hold imported or newer data
+    has_history = bool(store.query("SELECT 1 FROM networth_snapshots LIMIT 1"))
+    has_forecast = bool(store.query("SELECT 1 FROM weather_forecasts LIMIT 1"))
+    snapshots = []
+    if os.path.exists(LEGACY_NETWORTH_HISTORY) and not has_history:
+        try:
+            snapshots = datastore.read_legacy_series_file(
+                LEGACY_NETWORTH_HISTORY, os.path.splitext(LEGACY_NETWORTH_HISTORY)[0] + ".json")
+        except Exception as e:
+            print(f"[datastore] Could not read {LEGACY_NETWORTH_HISTORY}: {e}")
+
+    legacy = {}
+    if os.path.exists(STATE):
+        try:
+            with open(STATE) as f:
+                legacy = json.load(f)
+        except Exception as e:
+            print(f"[datastore] Could not read {STATE}: {e}")
+
+    imported = []
+    import_portfolio = legacy.get("portfolio_details") and not has_history
+    portfolio_ts = _legacy_portfolio_ts(legacy, snapshots) if import_portfolio else None
+    for ts, total, details in snapshots:
+        store.record_portfolio(total, details, ts=ts)
+    if snapshots:
+        imported.append(f"{len(snapshots)} snapshots from {LEGACY_NETWORTH_HISTORY}")
+    if portfolio_ts is not None:
+        details = legacy["portfolio_details"]
+        store.record_portfolio(details.get("total_value") or 0.0, details, ts=portfolio_ts)
+        imported.append(f"the portfolio from {STATE}")
+    if legacy.get("weather_forecast") and legacy.get("weather_stamp") and not has_forecast:
+        try:
+            # Fetched some time that day; start of day so any newer forecast replaces it
+            fetched_at = datetime.fromisoformat(legacy["weather_stamp"]).timestamp()
+            store.put_forecast(legacy["weather_forecast"], fetched_at=fetched_at)
+            imported.append(f"the forecast from {STATE}")
+        except ValueError as e:
+            print(f"[datastore] Could not import the forecast from {STATE}: {e}")
+
+    # Marked even when there was nothing to import, so the check doesn't rerun on every start
+    store.set_meta(LEGACY_IMPORT_MARKER, datetime.now().isoformat(timespec="seconds")).result()
+    if imported:
+        print(f"[datastore] Imported {', '.join(imported)}.")
+
+import_legacy_state()
+# Any change rebuilds the rendered frame; cached API responses key off state.version
+state = StateStore(STATE, default_state, on_change=lambda: frame.invalidate_frame())
+startup.mark("config and state loaded")
 
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Pi Dashboard App")
     parser.add_argument('--manual-login', action='store_true', help="Run browser for Fidelity manual login")
     parser.add_argument('--clean', action='store_true', help="Delete authentication pickle files to fix token errors")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="Print import/init timings once the first request has been served")
     return parser.parse_args()
 
 
@@ -226,29 +327,85 @@ if args.manual_login:
     manual_login_flow()
 
 
-def periodic_update():
-    """Combined update job."""
-    print("[periodic_update] Running combined update...")
-    update_weather_state()
-    update_health_state()
-    fetch_net_worth()
+UPDATE_JOBS = {
+    "weather": update_weather_state,
+    "health": update_health_state,
+    "net_worth": fetch_net_worth,
+}
+JOB_TIMEOUT_HANDLERS = {
+    # Show the stale net worth as an error rather than silently waiting on a hung login
+    "net_worth": lambda: state.update({"error": True}),
+}
 
 
-print("[startup] Performing initial data fetch...")
-periodic_update()
+def run_job(name):
+    jobs.submit(name, UPDATE_JOBS[name], timeout=JOB_TIMEOUTS[name], on_timeout=JOB_TIMEOUT_HANDLERS.get(name))
 
-reschedule()
 
-
-def scheduler_loop():
-    while True:
-        schedule.run_pending()
-        time.sleep(30)
+def periodic_update():
+    """Combined update job: starts every source concurrently and returns immediately."""
+    print("[periodic_update] Running combined update...")
+    for name in UPDATE_JOBS:
+        run_job(name)
+    # Per-day cache keys pile up; drop entries too old to ever be served again
+    expired_before = time.time() - max(CALENDAR_TTL_SECONDS, NEWS_TTL_SECONDS) - STALE_TTL_SECONDS
+    for source in ("calendar", "upcoming_events", "news"):
+        store.prune_cache(source, expired_before)
 
 
-threading.Thread(target=scheduler_loop, daemon=True).start()
+# The initial fetch runs in the background; until it lands the server serves the last saved state
+print("[startup] Starting initial data fetch in the background...")
+periodic_update()
 
-app = Flask(__name__, static_url_path="/static")
+scheduler = create_scheduler()
+scheduler.start()
+reschedule()
+startup.mark("scheduler started")
+
+if args.profile_startup:
+    @app.after_request
+    def report_startup_profile(response):
+        startup.first_request_served()
+        return response
+
+_response_cache = {}  # endpoint -> (version, etag, body)
+
+
+def json_etag(version_fn=None):
+    """Serves a view's JSON payload with an ETag and answers 304 when the client already has it.
+
+    Views return a payload (or a (payload, status) tuple) instead of a Response. When version_fn
+    is given, the serialized body is reused until the version changes, so unchanged polls skip
+    rebuilding and reserializing the payload entirely.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            version = version_fn() if version_fn else None
+            cached = _response_cache.get(request.endpoint)
+            if version is not None and cached and cached[0] == version:
+                _, etag, body = cached
+                status = 200
+            else:
+                rv = view(*args, **kwargs)
+                payload, status = rv if isinstance(rv, tuple) else (rv, 200)
+                body = json.dumps(payload, separators=(",", ":"))
+                etag = hashlib.sha1(body.encode("utf-8")).hexdigest()
+                if version is not None and status == 200:
+                    _response_cache[request.endpoint] = (version, etag, body)
+
+            if status != 200:
+                return Response(body, status=status, mimetype="application/json")
+
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                response = Response(body, mimetype="application/json")
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+        return wrapper
+    return decorator
 
 
 @app.route("/")
@@ -257,10 +414,10 @@ def home():
     return render_template("dashboard.html", mode=mode)
 
 
-@app.route("/api/data")
-def api_data():
-    current_net_worth = state.get("net_worth")
-    yesterday_net_worth = state.get("yesterday")
+def build_networth_view():
+    current = state.snapshot()
+    current_net_worth = current.get("net_worth")
+    yesterday_net_worth = current.get("yesterday")
     delta_to_show = None
     if current_net_worth is not None and yesterday_net_worth is not None:
         try:
@@ -268,17 +425,121 @@ def api_data():
         except (ValueError, TypeError):
             delta_to_show = None
 
-    return jsonify(
+    return dict(
         net_worth=current_net_worth,
         change=delta_to_show,
-        last_updated=state.get("last_updated"),
-        error=state.get("error", False),
+        last_updated=current.get("last_updated"),
+        error=current.get("error", False),
         # Robinhood error removed
-        details=state.get("portfolio_details"),
-        battery=state.get("battery")
+        details=store.latest_portfolio()[0],
+        battery=current.get("battery")
     )
 
 
+def build_weather_view():
+    """Two past days (their last stored forecast), today and the next two days."""
+    today = date.today()
+    days = [(today + timedelta(days=offset)).isoformat() for offset in range(-2, 3)]
+    stored = store.forecast(days[0], days[-1])
+    return {"forecast": [stored.get(day) for day in days]}
+
+
+def _calendar_key():
+    return f"calendar:{date.today().isoformat()}"
+
+
+def _upcoming_events_key():
+    return f"upcoming_events:{date.today().isoformat()}"
+
+
+def build_calendar_view():
+    events = upstream_cache.get(_calendar_key(), lambda: google_calendar.get_events_surrounding_days(num_days=2, calendars=config.get("calendars")),
+                                ttl=CALENDAR_TTL_SECONDS, stale_ttl=STALE_TTL_SECONDS)
+    return {"events": events}
+
+
+def build_upcoming_events_view():
+    events = upstream_cache.get(_upcoming_events_key(),
+                                lambda: google_calendar.get_upcoming_events(start_day_offset=3, num_days=30,
+                                                                            calendars=config.get("calendars")),
+                                ttl=CALENDAR_TTL_SECONDS, stale_ttl=STALE_TTL_SECONDS)
+    return {"events": events}
+
+
+def build_news_view():
+    # Get 4-5 news items
+    news_items = upstream_cache.get("news", lambda: news.get_political_news(limit=5),
+                                    ttl=NEWS_TTL_SECONDS, stale_ttl=STALE_TTL_SECONDS)
+    return {"news": news_items}
+
+
+def build_health_view():
+    return state.get("health_stats") or None
+
+
+# Section name -> (builder, when its data was last produced as an epoch timestamp)
+DASHBOARD_SECTIONS = {
+    "networth": (build_networth_view, lambda: state.updated_at),
+    "weather": (build_weather_view, lambda: state.updated_at),
+    "calendar": (build_calendar_view, lambda: upstream_cache.fetched_at(_calendar_key())),
+    "upcoming_events": (build_upcoming_events_view, lambda: upstream_cache.fetched_at(_upcoming_events_key())),
+    "news": (build_news_view, lambda: upstream_cache.fetched_at("news")),
+    "health": (build_health_view, lambda: state.updated_at),
+}
+DASHBOARD_SECTION_TIMEOUT_SECONDS = 20
+dashboard_pool = ThreadPoolExecutor(max_workers=len(DASHBOARD_SECTIONS), thread_name_prefix="dashboard")
+
+
+@app.route("/api/dashboard")
+@json_etag()
+def api_dashboard():
+    """Every panel in one response, assembled concurrently. A failing section carries its
+    error instead of failing the whole document."""
+    futures = {name: dashboard_pool.submit(builder) for name, (builder, _) in DASHBOARD_SECTIONS.items()}
+
+    sections = {}
+    for name, future in futures.items():
+        section = {"data": None, "updated_at": None, "error": None}
+        try:
+            section["data"] = future.result(timeout=DASHBOARD_SECTION_TIMEOUT_SECONDS)
+        except Exception as e:
+            print(f"[dashboard] Section {name} failed: {e!r}")
+            section["error"] = str(e) or e.__class__.__name__
+
+        updated_at = DASHBOARD_SECTIONS[name][1]()
+        if updated_at:
+            section["updated_at"] = datetime.fromtimestamp(updated_at).isoformat(timespec="seconds")
+        sections[name] = section
+
+    return {"sections": sections}
+
+
+@app.route("/api/data")
+@json_etag(lambda: state.version)
+def api_data():
+    return build_networth_view()
+
+
+@app.route("/api/networth/history")
+@json_etag()
+def api_networth_history():
+    """Sparkline data: ?series=total|account:<name>|holding:<account>/<symbol>&rollup=daily&days=90"""
+    series = request.args.get("series", "total")
+    rollup = request.args.get("rollup", "daily")
+    if rollup not in datastore.ROLLUPS:
+        return {"error": f"rollup must be one of {', '.join(datastore.ROLLUPS)}"}, 400
+    try:
+        days = float(request.args.get("days", 90))
+    except ValueError:
+        return {"error": "Invalid days"}, 400
+
+    try:
+        points = store.networth_series(series, start=time.time() - days * 86400, rollup=rollup)
+    except KeyError:
+        return {"error": f"Unknown series: {series}", "series": store.networth_series_names()}, 404
+    return {"series": series, "rollup": rollup, **points}
+
+
 @app.route("/api/battery", methods=["POST"])
 def api_battery():
     data = request.json
@@ -295,71 +556,78 @@ def api_battery():
 
 
 @app.route("/api/weather")
+@json_etag(lambda: (state.version, date.today()))
 def api_weather():
     try:
-        days_to_display_on_dashboard = [None] * 5
-        history = state.get("weather_history", [None, None])
-        days_to_display_on_dashboard[0] = history[0]
-        days_to_display_on_dashboard[1] = history[1]
-        current_7day_forecast = state.get("weather_forecast", [])
-        today_iso = date.today().isoformat()
-        forecast_start_index_for_today = 0
-
-        if current_7day_forecast and current_7day_forecast[0] and current_7day_forecast[0].get("date") != today_iso:
-            for idx, day_data in enumerate(current_7day_forecast):
-                if day_data and day_data.get("date") == today_iso:
-                    forecast_start_index_for_today = idx
-                    break
-
-        for i in range(3):
-            forecast_idx_in_7day_list = forecast_start_index_for_today + i
-            if forecast_idx_in_7day_list < len(current_7day_forecast):
-                days_to_display_on_dashboard[2 + i] = current_7day_forecast[forecast_idx_in_7day_list]
-
-        return jsonify({"forecast": days_to_display_on_dashboard})
+        return build_weather_view()
     except Exception as e:
         print(f"[api/weather] API error: {e}")
-        return jsonify({"error": "Could not construct weather view", "forecast": [None] * 5}), 500
+        return {"error": "Could not construct weather view", "forecast": [None] * 5}, 500
 
 
 @app.route("/api/calendar")
+@json_etag()
 def api_calendar():
     try:
-        events = get_events_surrounding_days(num_days=2)
-        return jsonify({"events": events})
+        return build_calendar_view()
     except Exception as e:
         print(f"[calendar] API error: {e}")
-        return jsonify({"error": "Could not fetch calendar events"}), 500
+        return {"error": "Could not fetch calendar events"}, 500
 
 
 @app.route("/api/upcoming_events")
+@json_etag()
 def api_upcoming_events():
     try:
-        events = get_upcoming_events(start_day_offset=3, num_days=30)
-        return jsonify({"events": events})
+        return build_upcoming_events_view()
     except Exception as e:
         print(f"[upcoming_events] API error: {e}")
-        return jsonify({"error": "Could not fetch upcoming events"}), 500
+        return {"error": "Could not fetch upcoming events"}, 500
 
 
 @app.route("/api/health")
+@json_etag(lambda: state.version)
 def api_health():
-    health_data = state.get("health_stats")
-    if health_data:
-        return jsonify(health_data)
-    else:
-        return jsonify(None)
+    return build_health_view()
 
 
 @app.route("/api/news")
+@json_etag()
 def api_news():
     try:
-        # Get 4-5 news items
-        news_items = get_political_news(limit=5)
-        return jsonify({"news": news_items})
+        return build_news_view()
     except Exception as e:
         print(f"[news] API error: {e}")
-        return jsonify({"error": "Could not fetch news"}), 500
+        return {"error": "Could not fetch news"}, 500
+
+
+@app.route("/api/frame.raw")
+def api_frame_raw():
+    """Renders the dashboard on the host and returns the ready-to-flash raw e-ink frame.
+
+    The ETag is the frame's content hash. A client sending the hash it currently displays
+    gets 304 when nothing changed, otherwise X-Dirty-Rects lists the regions to refresh
+    ("x,y,w,h;..." in raw buffer coordinates, or "full" when no partial update is possible).
+    """
+    mode = request.args.get('mode', 'grayscale')
+    try:
+        entry = frame.get_frame(f"http://127.0.0.1:{PORT}/?mode={mode}")
+    except Exception as e:
+        print(f"[frame] Render error: {e}")
+        return jsonify({"error": "Could not render frame"}), 500
+
+    since_hash = next(iter(request.if_none_match), None)
+    rects = frame.get_frame_diff(entry, since_hash) if since_hash else None
+    if rects == []:
+        return Response(status=304, headers={"ETag": f'"{entry["hash"]}"'})
+
+    dirty = "full" if rects is None else ";".join(",".join(str(v) for v in r) for r in rects)
+    return Response(entry["data"], mimetype="application/octet-stream", headers={
+        "ETag": f'"{entry["hash"]}"',
+        "X-Frame-Width": str(frame.FRAME_WIDTH),
+        "X-Frame-Height": str(frame.FRAME_HEIGHT),
+        "X-Dirty-Rects": dirty,
+    })
 
 
 @app.route("/api/refresh", methods=["POST"])
@@ -374,8 +642,15 @@ def api_refresh():
     except IOError as e:
         return jsonify({"error": "Failed to save config"}), 500
     reschedule()
-    return jsonify({"status": "ok", "new_schedule": schedule.jobs})
+    return jsonify({"status": "ok", "new_schedule": describe_jobs(scheduler, jobs.status())})
+
+
+@app.route("/api/jobs")
+def api_jobs():
+    """Next run time of every scheduled job, how its source's last run went, and upstream HTTP timings."""
+    return jsonify({"jobs": describe_jobs(scheduler, jobs.status()), "http": http_client.get_session().timings()})
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000)
\ No newline at end of file
+    startup.mark("app ready to serve")
+    app.run(host="0.0.0.0", port=PORT)
\ No newline at end of file
@@ -0,0 +1,43 @@
+# bench_common.py - Timing and generated-fixture helpers shared by the benchmark scripts
+import os
+import sys
+import tempfile
+import time
+
+# Importing this module makes the Host modules importable from the scripts
+HOST_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if HOST_DIR not in sys.path:
+    sys.path.insert(0, HOST_DIR)
+
+
+def best_time(fn, repeat: int, before=None) -> float:
+    """Fastest of repeat calls of fn(), in seconds. before() runs untimed ahead of each call."""
+    best = float("inf")
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def add_fixtures_dir_arg(parser):
+    parser.add_argument("--fixtures-dir", help="Where generated fixtures are written (default: temp dir)")
+
+
+def fixtures_dir(path: str, prefix: str) -> str:
+    """path (created if missing), or a new temp dir named prefix* when path is None."""
+    if not path:
+        return tempfile.mkdtemp(prefix=prefix)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def generated_fixture(directory: str, filename: str, build) -> str:
+    """directory/filename, first writing build()'s text there if it doesn't exist yet."""
+    path = os.path.join(directory, filename)
+    if not os.path.exists(path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(build())
+    return path
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# bench_health_dates.py - Day bucketing of Health Auto Export timestamps: strptime vs health_dates
+#
+# Usage (from Host/):
+#   python benchmarks/bench_health_dates.py                      # generated multi-month export
+#   python benchmarks/bench_health_dates.py --export export.json # a real HealthAutoExport file
+import argparse
+import datetime
+import json
+import os
+import random
+
+from bench_common import add_fixtures_dir_arg, best_time, fixtures_dir, generated_fixture
+import health_dates
+from health_dates import EXPORT_TIMESTAMP_FORMAT, LOCAL_TZ, local_date_of
+
+FIXTURE_START = datetime.date(2024, 1, 15)  # Spans the March DST change
+FIXTURE_DAYS = 120
+MINUTE_METRICS = ("step_count", "active_energy")
+# Mostly home, with a few days abroad so non-local offsets are exercised too
+TRAVEL_OFFSETS = {40: "+0100", 41: "+0100", 90: "+0530"}
+# Malformed or unusual timestamps the fast path must answer exactly like strptime (value or ValueError)
+EDGE_TIMESTAMPS = ("2024-03-10 12:00:00 -0699", "2024-03-10 12:00:00 -0660", "2024-03-10 12:00:00 +2500",
+                   "2024-03-10 12:00:60 -0600", "2024-03-10 24:00:00 -0600", "2024-02-30 12:00:00 -0600",
+                   "2024-03-10 12:00:00 +0545", "2024-03-10 12:00:00 -2359", "2024-03-10 12:00 -0600")
+
+
+def make_export_fixture(days: int = FIXTURE_DAYS, seed: int = 0) -> dict:
+    """A Health Auto Export-shaped document with minute-level step and energy samples."""
+    rng = random.Random(seed)
+    metrics = {name: [] for name in MINUTE_METRICS + ("resting_heart_rate",)}
+    for day_index in range(days):
+        day = FIXTURE_START + datetime.timedelta(days=day_index)
+        offset = TRAVEL_OFFSETS.get(day_index)
+        for minute in range(0, 24 * 60):
+            if rng.random() < 0.35:  # Phones only record minutes with activity
+                continue
+            moment = datetime.datetime.combine(day, datetime.time(minute // 60, minute % 60))
+            if offset is None:
+                stamp = LOCAL_TZ.localize(moment).strftime(EXPORT_TIMESTAMP_FORMAT)
+            else:
+                stamp = f"{moment:%Y-%m-%d %H:%M:%S} {offset}"
+            metrics["step_count"].append({"date": stamp, "qty": rng.randint(0, 140), "source": "iPhone"})
+            metrics["active_energy"].append({"date": stamp, "qty": round(rng.uniform(0, 8), 3), "source": "Watch"})
+        metrics["resting_heart_rate"].append({"date": f"{day} 00:00:00 -0600", "qty": rng.randint(50, 65)})
+    return {"data": {"metrics": [{"name": name, "units": "count", "data": points}
+                                 for name, points in metrics.items()]}}
+
+
+def _legacy_date(timestamp):
+    """The original per-point conversion: the day in the timestamp's own offset."""
+    return datetime.datetime.strptime(timestamp, EXPORT_TIMESTAMP_FORMAT).date().isoformat()
+
+
+def _reference_local_date(timestamp):
+    """strptime plus a timezone conversion: correct local-day bucketing, the slow way."""
+    return datetime.datetime.strptime(timestamp, EXPORT_TIMESTAMP_FORMAT).astimezone(LOCAL_TZ).date().isoformat()
+
+
+def _outcome(fn, timestamp):
+    try:
+        return fn(timestamp)
+    except ValueError:
+        return "ValueError"
+
+
+def check_edge_cases():
+    mismatches = [t for t in EDGE_TIMESTAMPS if _outcome(local_date_of, t) != _outcome(_reference_local_date, t)]
+    print(f"edge cases: {len(EDGE_TIMESTAMPS) - len(mismatches)}/{len(EDGE_TIMESTAMPS)} match strptime")
+    for t in mismatches:
+        print(f"  WARNING: {t!r}: local_date_of {_outcome(local_date_of, t)!r}, "
+              f"strptime {_outcome(_reference_local_date, t)!r}")
+
+
+def bench(timestamps, repeat):
+    print(f"{len(timestamps):,} timestamps")
+    expected = [_reference_local_date(t) for t in timestamps]
+    actual = [local_date_of(t) for t in timestamps]
+    mismatches = sum(a != e for a, e in zip(actual, expected))
+    legacy_differs = sum(_legacy_date(t) != e for t, e in zip(timestamps, expected))
+
+    clear_cache = health_dates._hour_days.clear
+    rows = [
+        ("strptime (legacy, export offset)", best_time(lambda: [_legacy_date(t) for t in timestamps], repeat)),
+        ("strptime + astimezone", best_time(lambda: [_reference_local_date(t) for t in timestamps], repeat)),
+        ("local_date_of, cold cache", best_time(lambda: [local_date_of(t) for t in timestamps], repeat, clear_cache)),
+        ("local_date_of, warm cache", best_time(lambda: [local_date_of(t) for t in timestamps], repeat)),
+    ]
+    for label, seconds in rows:
+        print(f"  {label:<34} {seconds * 1000:>9.1f}ms {seconds / len(timestamps) * 1e9:>7.0f}ns/point")
+    print(f"  cached hours: {len(health_dates._hour_days)}")
+    print(f"  points the legacy code bucketed on a different local day: {legacy_differs}")
+    if mismatches:
+        print(f"  WARNING: local_date_of disagrees with strptime + astimezone on {mismatches} points!")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark health export timestamp bucketing")
+    parser.add_argument("--export", help="A HealthAutoExport JSON file (default: generated fixture)")
+    add_fixtures_dir_arg(parser)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    path = args.export
+    if not path:
+        path = generated_fixture(fixtures_dir(args.fixtures_dir, "health_fixtures_"),
+                                 f"HealthAutoExport-{FIXTURE_DAYS}d.json", lambda: json.dumps(make_export_fixture()))
+
+    with open(path) as f:
+        export = json.load(f)
+    print(f"{os.path.basename(path)} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    timestamps = [point["date"] for metric in export["data"]["metrics"] for point in metric.get("data", [])]
+    bench(timestamps, args.repeat)
+    check_edge_cases()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# bench_http_client.py - Upstream fetches: one-off requests.get vs the pooled http_client session
+#
+# Usage (from Host/):
+#   python benchmarks/bench_http_client.py                                         # local fake upstream
+#   python benchmarks/bench_http_client.py --url https://api.open-meteo.com/v1/forecast?latitude=41.9&longitude=-87.6
+import argparse
+import time
+
+import requests
+
+import bench_common  # noqa: F401  (makes the Host modules importable)
+import http_client
+from fake_upstream import FakeUpstreamServer
+
+
+def _run(label, fetch, url, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        fetch(url).raise_for_status()
+    seconds = time.perf_counter() - start
+    print(f"  {label:<28} {seconds * 1000:>8.1f}ms {seconds / count * 1000:>7.2f}ms/request")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pooled vs unpooled HTTP fetches")
+    parser.add_argument("--url", help="URL to fetch (default: a local fake upstream)")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--fail-every", type=int, default=0, help="Fake upstream: 503 every Nth request")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if not url:
+        server = FakeUpstreamServer(fail_every=args.fail_every).start()
+        url = f"{server.url}/v1/forecast"
+    print(f"{args.count} GETs of {url}")
+
+    if not args.fail_every:
+        _run("requests.get (no session)", lambda u: requests.get(u, timeout=10), url, args.count)
+        if server:
+            print(f"  connections opened: {server.connections}")
+    before = server.connections if server else 0
+    session = http_client.TimedSession()
+    _run("http_client.TimedSession", session.get, url, args.count)
+    if server:
+        print(f"  connections opened: {server.connections - before}")
+    for host, stats in session.timings().items():
+        print(f"  {host}: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# bench_positions_parse.py - Parse time and peak memory of each positions grid parser backend
+#
+# Usage (from Host/):
+#   python benchmarks/bench_positions_parse.py                   # generated multi-account fixtures
+#   python benchmarks/bench_positions_parse.py --html saved.html # a saved Fidelity positions page
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+
+from bench_common import add_fixtures_dir_arg, best_time, fixtures_dir, generated_fixture
+from fidelity_parsers import PARSER_BACKENDS, clean_number
+
+# (accounts, positions per account) for the generated fixtures
+FIXTURE_SIZES = [(3, 20), (10, 60), (25, 150)]
+CELLS_PER_ROW = 16
+
+
+def _cell(text):
+    # AG Grid wraps every value in a few layers of spans
+    return (f'<div role="gridcell" class="ag-cell ag-cell-not-inline-editing"><span class="ag-cell-wrapper">'
+            f'<span class="ag-cell-value"><span class="posweb-cell-value">{text}</span></span></span></div>')
+
+
+def make_positions_fixture(num_accounts: int, positions_per_account: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    pinned, center = [], []
+    row = 0
+    for a in range(num_accounts):
+        pinned.append(f'<div role="row" row-id="acct-{a}" class="ag-row posweb-row-account">'
+                      f'<div role="gridcell"><span class="posweb-cell-account_primary">Account {a}</span>'
+                      f'<span class="posweb-cell-account_secondary">Z{10000000 + a}</span></div></div>')
+        center.append(f'<div role="row" row-id="acct-{a}" class="ag-row"></div>')
+        for p in range(positions_per_account):
+            row += 1
+            symbol = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(rng.randint(2, 5)))
+            value = rng.uniform(10, 250000)
+            cost = value / rng.uniform(0.5, 2.0)
+            cells = ["--"] * CELLS_PER_ROW
+            cells[4] = f"{'+' if value >= cost else '-'}${abs(value - cost):,.2f}"
+            cells[5] = f"{(value - cost) / cost * 100:+.2f}%"
+            cells[6] = f"${value:,.2f}"
+            cells[10] = f"${cost:,.2f}"
+            pinned.append(f'<div role="row" row-id="pos-{row}" class="ag-row posweb-row-position">'
+                          f'<div role="gridcell"><div class="posweb-cell-symbol-name_container">'
+                          f'<span>{symbol}</span><button>Menu</button></div></div></div>')
+            center.append(f'<div role="row" row-id="pos-{row}" class="ag-row">{"".join(_cell(c) for c in cells)}</div>')
+
+    return ('<html><head><title>Positions</title></head><body><div class="ag-root">'
+            f'<div class="ag-pinned-left-cols-container">{"".join(pinned)}</div>'
+            f'<div class="ag-center-cols-container">{"".join(center)}</div>'
+            '</div></body></html>')
+
+
+def _legacy_clean_number(txt):
+    """The original per-call regex implementation, kept for comparison."""
+    import re
+    if not txt or txt == '--': return 0.0
+    match = re.search(r'([+\-]?[0-9,]+(\.[0-9]+)?)', txt)
+    if match:
+        clean_str = match.group(1).replace(',', '').replace('+', '')
+        try:
+            return float(clean_str)
+        except:
+            return 0.0
+    return 0.0
+
+
+def _peak_memory(fn):
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def bench_file(path, repeat):
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+
+    results = {}
+    print(f"\n{os.path.basename(path)} ({len(content) / 1e6:.1f} MB)")
+    # Peak memory is the Python heap (tracemalloc); libxml2's own allocations are not included
+    print(f"  {'backend':<12} {'best time':>10} {'peak mem':>10} {'positions':>10}")
+    for name, parse in PARSER_BACKENDS.items():
+        # The debug print for zero-gain holdings would dominate the timing
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                parsed = parse(content)
+                seconds = best_time(lambda: parse(content), repeat)
+                peak = _peak_memory(lambda: parse(content))
+            finally:
+                sys.stdout = stdout
+        results[name] = parsed
+        count = sum(len(h) for _, h in parsed)
+        print(f"  {name:<12} {seconds * 1000:>8.1f}ms {peak / 1e6:>8.1f}MB {count:>10}")
+
+    outputs = list(results.values())
+    if any(o != outputs[0] for o in outputs[1:]):
+        print("  WARNING: backends disagree on parsed output!")
+
+
+def bench_clean_number(repeat):
+    samples = ["$1,234,567.89", "+$12.34", "-4.56%", "--", "", "$0.00", "+123.45%"] * 2000
+    legacy = best_time(lambda: [_legacy_clean_number(s) for s in samples], repeat)
+    current = best_time(lambda: [clean_number(s) for s in samples], repeat)
+    print(f"\nclean_number x{len(samples)}: legacy {legacy * 1000:.1f}ms, precompiled {current * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Fidelity positions parser backends")
+    parser.add_argument("--html", nargs="*", default=[], help="Saved positions page(s) to parse")
+    add_fixtures_dir_arg(parser)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    paths = list(args.html)
+    if not paths:
+        directory = fixtures_dir(args.fixtures_dir, "positions_fixtures_")
+        for accounts, positions in FIXTURE_SIZES:
+            paths.append(generated_fixture(directory, f"positions_{accounts}x{positions}.html",
+                                           lambda: make_positions_fixture(accounts, positions)))
+
+    print(f"Backends: {', '.join(PARSER_BACKENDS)}")
+    for path in paths:
+        bench_file(path, args.repeat)
+    bench_clean_number(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# check_fidelity_payloads.py - Do the JSON payload parsers agree with the rendered-page parsers?
+#
+# Usage (from Host/):
+#   python benchmarks/check_fidelity_payloads.py                 # bundled sample fixtures
+#   FIDELITY_CAPTURE_DIR=captures python app.py                  # record a real positions/balances pair
+#   python benchmarks/check_fidelity_payloads.py captures        # ...then check it
+import argparse
+import json
+import os
+import sys
+
+import bench_common  # noqa: F401  (makes the Host modules importable)
+import fidelity
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "fidelity_sample")
+CHECKS = {
+    # kind: (payload parser, page parser, comparison)
+    "positions": ("_parse_positions_payload", "_parse_positions", fidelity.positions_agree),
+    "balances": ("_parse_balances_payload", "_parse_balances", fidelity.balances_agree),
+}
+
+
+def check(directory: str) -> bool:
+    # The parsers don't touch the browser, so skip __init__ (which would launch one)
+    bot = fidelity.FidelityAutomation.__new__(fidelity.FidelityAutomation)
+    bot.parser_backend = None
+    bot.debug = True
+    ok = True
+    for kind, (parse_payload, parse_page, agree) in CHECKS.items():
+        json_path, html_path = (os.path.join(directory, f"{kind}.{ext}") for ext in ("json", "html"))
+        if not (os.path.exists(json_path) and os.path.exists(html_path)):
+            print(f"{kind}: no {kind}.json/{kind}.html pair in {directory}")
+            continue
+        with open(json_path, encoding="utf-8") as f:
+            payloads = json.load(f)
+        with open(html_path, encoding="utf-8") as f:
+            content = f.read()
+
+        from_json, from_page = fidelity.empty_portfolio(), fidelity.empty_portfolio()
+        parsed = getattr(bot, parse_payload)(payloads, from_json)
+        getattr(bot, parse_page)(content, from_page)
+        if parsed and agree(from_json, from_page):
+            print(f"{kind}: JSON agrees with the page")
+        else:
+            ok = False
+            print(f"{kind}: MISMATCH (JSON {'parsed' if parsed else 'not usable'})")
+            print(f"  JSON: {json.dumps(from_json)}")
+            print(f"  page: {json.dumps(from_page)}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check Fidelity JSON payload parsing against the rendered pages")
+    parser.add_argument("directory", nargs="?", default=SAMPLE_DIR,
+                        help="Directory with positions/balances .json + .html pairs (default: bundled sample)")
+    args = parser.parse_args()
+    sys.exit(0 if check(args.directory) else 1)
+
+
+if __name__ == "__main__":
+    main()
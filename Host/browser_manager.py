@@ -0,0 +1,166 @@
+# browser_manager.py - Keeps one warm Firefox instance alive between scheduled fetches
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from playwright.sync_api import sync_playwright, Error as PlaywrightError
+
+
+class _Worker:
+    """The browser thread and the Playwright objects bound to it."""
+
+    def __init__(self, generation: int):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"browser-{generation}")
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.retired = False
+
+
+class BrowserManager:
+    """Owns a long-lived Playwright Firefox browser and a reusable context.
+
+    Playwright's sync API is thread-bound, so browser work runs on one worker thread via run(). The
+    browser is relaunched if it crashed and closed after idle_minutes without work.
+    """
+
+    def __init__(self, storage_state_path: str = None, idle_minutes: float = 30, headless: bool = True):
+        self.storage_state_path = storage_state_path
+        self.idle_seconds = idle_minutes * 60
+        self.headless = headless
+        self._generation = 0
+        self._worker = _Worker(self._generation)
+        self._worker_lock = threading.Lock()
+        self._last_used = 0.0
+        self._idle_timer = None
+        self._timer_lock = threading.Lock()
+
+    def run(self, fn, timeout: float = None):
+        """Runs fn(context) on the browser thread and returns its result.
+
+        If the browser dies while fn is running, it is relaunched and fn is retried once. Raises
+        concurrent.futures.TimeoutError if fn takes longer than timeout.
+        """
+        worker = self._worker
+        future = worker.executor.submit(self._run, worker, fn)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self._retire(worker)
+            raise
+
+    def shutdown(self):
+        """Closes the browser (if running) and stops the worker thread."""
+        self._cancel_idle_timer()
+        worker = self._worker
+        worker.executor.submit(self._stop, worker).result()
+        worker.executor.shutdown(wait=False)
+
+    def _retire(self, worker: _Worker):
+        """Swaps in a fresh worker and kills the stuck one's driver so its call fails and it exits.
+
+        The Playwright objects can't be closed from this thread, hence the kill.
+        """
+        with self._worker_lock:
+            if self._worker is not worker:
+                return
+            self._generation += 1
+            self._worker = _Worker(self._generation)
+        print("[browser] Run timed out; killing the browser and starting a fresh worker.")
+        worker.retired = True
+        try:
+            worker.playwright._impl_obj._connection._transport._proc.kill()
+        except Exception as e:
+            print(f"[browser] Could not kill the Playwright driver (ignored): {e}")
+        worker.executor.submit(self._stop, worker)
+        worker.executor.shutdown(wait=False)
+
+    def _run(self, worker: _Worker, fn):
+        if worker.retired:
+            raise RuntimeError("Browser worker was reset after a timeout")
+        self._cancel_idle_timer()
+        try:
+            for attempt in (1, 2):
+                self._ensure_started(worker)
+                try:
+                    return fn(worker.context)
+                except Exception:
+                    if worker.retired or self._is_healthy(worker) or attempt == 2:
+                        raise
+                    print("[browser] Browser crashed during run; relaunching and retrying once.")
+                    self._stop(worker)
+        finally:
+            self._last_used = time.time()
+            if not worker.retired:
+                self._schedule_idle_shutdown()
+
+    @staticmethod
+    def _is_healthy(worker: _Worker) -> bool:
+        if not worker.browser or not worker.context:
+            return False
+        try:
+            if not worker.browser.is_connected():
+                return False
+            worker.context.pages  # Raises if the context was torn down underneath us
+            return True
+        except PlaywrightError:
+            return False
+
+    def _ensure_started(self, worker: _Worker):
+        if self._is_healthy(worker):
+            return
+        if worker.playwright:
+            print("[browser] Browser unhealthy; restarting.")
+            self._stop(worker)
+
+        start = time.time()
+        worker.playwright = sync_playwright().start()
+        worker.browser = worker.playwright.firefox.launch(
+            headless=self.headless,
+            args=["--disable-webgl", "--disable-software-rasterizer"],
+        )
+        has_state = self.storage_state_path and os.path.exists(self.storage_state_path)
+        worker.context = worker.browser.new_context(
+            storage_state=self.storage_state_path if has_state else None,
+            viewport={"width": 1920, "height": 1080}
+        )
+        print(f"[browser] Firefox started in {time.time() - start:.1f}s.")
+
+    @staticmethod
+    def _stop(worker: _Worker):
+        for closer in (lambda: worker.context and worker.context.close(),
+                       lambda: worker.browser and worker.browser.close(),
+                       lambda: worker.playwright and worker.playwright.stop()):
+            try:
+                closer()
+            except Exception as e:
+                print(f"[browser] Error during shutdown (ignored): {e}")
+        worker.playwright = worker.browser = worker.context = None
+
+    def _shutdown_if_idle(self, worker: _Worker):
+        if worker.browser and time.time() - self._last_used >= self.idle_seconds:
+            print("[browser] Idle timeout reached; closing Firefox.")
+            self._stop(worker)
+
+    def _schedule_idle_shutdown(self):
+        with self._timer_lock:
+            if self._idle_timer:
+                self._idle_timer.cancel()
+            # The timer only enqueues the shutdown; the browser itself is touched on the worker thread
+            self._idle_timer = threading.Timer(self.idle_seconds, self._enqueue_idle_shutdown)
+            self._idle_timer.daemon = True
+            self._idle_timer.start()
+
+    def _enqueue_idle_shutdown(self):
+        worker = self._worker
+        try:
+            worker.executor.submit(self._shutdown_if_idle, worker)
+        except RuntimeError:
+            pass  # Worker was retired meanwhile
+
+    def _cancel_idle_timer(self):
+        with self._timer_lock:
+            if self._idle_timer:
+                self._idle_timer.cancel()
+                self._idle_timer = None
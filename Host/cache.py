@@ -0,0 +1,115 @@
+# cache.py - In-process TTL cache with stale-while-revalidate for slow upstream data
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """A small LRU-bounded cache whose entries expire per key.
+
+    Entries past their ttl are still served (for up to stale_ttl more, or forever if None) while one
+    background thread reloads them; only a missing entry makes callers wait, sharing one load. With
+    a backing store (get_cache/put_cache), values are written through and survive a restart.
+    """
+
+    def __init__(self, max_size: int = 64, name: str = "cache", backing=None):
+        self.max_size = max_size
+        self.name = name
+        self.backing = backing
+        self._entries = OrderedDict()  # key -> {"value", "fetched_at"}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._refreshing = set()
+
+    def get(self, key, loader, ttl: float, stale_ttl: float = None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None and self.backing is not None:
+            entry = self._load_from_backing(key)
+
+        if entry is not None:
+            age = time.time() - entry["fetched_at"]
+            if age < ttl:
+                return entry["value"]
+            if stale_ttl is None or age < ttl + stale_ttl:
+                self._refresh_in_background(key, loader)
+                return entry["value"]
+
+        return self._load(key, loader)
+
+    def fetched_at(self, key):
+        """Epoch time the cached value for key was loaded, or None if it is not cached."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry["fetched_at"] if entry else None
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _key_lock(self, key) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _load(self, key, loader):
+        requested_at = time.time()
+        with self._key_lock(key):
+            # Another caller may have finished the same load while we waited
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and entry["fetched_at"] >= requested_at:
+                return entry["value"]
+
+            value = loader()
+            self._store(key, value)
+            return value
+
+    def _store(self, key, value, fetched_at: float = None, persist: bool = True):
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self._lock:
+            self._entries[key] = {"value": value, "fetched_at": fetched_at}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                evicted, _ = self._entries.popitem(last=False)
+                self._key_locks.pop(evicted, None)
+        if persist and self.backing is not None:
+            try:
+                self.backing.put_cache(key, value, fetched_at)
+            except Exception as e:
+                print(f"[{self.name}] Failed to persist {key}: {e}")
+
+    def _load_from_backing(self, key):
+        try:
+            stored = self.backing.get_cache(key)
+        except Exception as e:
+            print(f"[{self.name}] Failed to read {key} from backing store: {e}")
+            return None
+        if stored is None:
+            return None
+        value, fetched_at = stored
+        self._store(key, value, fetched_at, persist=False)
+        return {"value": value, "fetched_at": fetched_at}
+
+    def _refresh_in_background(self, key, loader):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                with self._key_lock(key):
+                    self._store(key, loader())
+            except Exception as e:
+                print(f"[{self.name}] Background refresh of {key} failed, serving stale value: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
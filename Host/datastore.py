@@ -0,0 +1,383 @@
+# datastore.py - Embedded SQLite store for dashboard history: net worth, holdings, health, weather, cache
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.path.join(_SCRIPT_DIR, "dashboard.db")
+BUSY_TIMEOUT_MS = 5000
+MAX_IDLE_READERS = 8
+ROLLUPS = ("raw", "daily", "weekly", "monthly")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS networth_snapshots (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    total REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS networth_snapshots_ts ON networth_snapshots(ts);
+
+-- One row per Fidelity holding and per non-Fidelity account balance (symbol NULL)
+CREATE TABLE IF NOT EXISTS holdings (
+    snapshot_id INTEGER NOT NULL REFERENCES networth_snapshots(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    account TEXT NOT NULL,
+    symbol TEXT,
+    value REAL NOT NULL,
+    pct_gain REAL,
+    PRIMARY KEY (snapshot_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS holdings_series ON holdings(account, symbol, snapshot_id);
+
+CREATE TABLE IF NOT EXISTS health_daily (
+    date TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (date, metric)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS weather_forecasts (
+    date TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    data TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_entries_source ON cache_entries(source, fetched_at);
+
+-- One-time markers, e.g. which migrations have run
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Statements are constant strings with ? parameters, so each connection's statement cache keeps
+# them prepared across calls
+_INSERT_SNAPSHOT = "INSERT INTO networth_snapshots (ts, total) VALUES (?, ?)"
+_INSERT_HOLDING = ("INSERT INTO holdings (snapshot_id, position, source, account, symbol, value, pct_gain) "
+                   "VALUES (?, ?, ?, ?, ?, ?, ?)")
+_LATEST_SNAPSHOT = "SELECT id, ts, total FROM networth_snapshots ORDER BY ts DESC LIMIT 1"
+_SNAPSHOT_HOLDINGS = ("SELECT source, account, symbol, value, pct_gain FROM holdings "
+                      "WHERE snapshot_id = ? ORDER BY position")
+_TOTAL_BETWEEN = "SELECT ts, total FROM networth_snapshots WHERE ts BETWEEN ? AND ? ORDER BY ts"
+_ACCOUNT_BETWEEN = ("SELECT s.ts, SUM(h.value) FROM holdings h JOIN networth_snapshots s ON s.id = h.snapshot_id "
+                    "WHERE h.account = ? AND s.ts BETWEEN ? AND ? GROUP BY s.id ORDER BY s.ts")
+_HOLDING_BETWEEN = ("SELECT s.ts, h.value FROM holdings h JOIN networth_snapshots s ON s.id = h.snapshot_id "
+                    "WHERE h.account = ? AND h.symbol = ? AND s.ts BETWEEN ? AND ? ORDER BY s.ts")
+_ACCOUNT_EXISTS = "SELECT 1 FROM holdings WHERE account = ? LIMIT 1"
+_HOLDING_EXISTS = "SELECT 1 FROM holdings WHERE account = ? AND symbol = ? LIMIT 1"
+_SERIES_KEYS = "SELECT DISTINCT account, symbol FROM holdings"
+_DELETE_HEALTH_DAY = "DELETE FROM health_daily WHERE date = ?"
+_INSERT_HEALTH = "INSERT INTO health_daily (date, metric, value) VALUES (?, ?, ?)"
+_PRUNE_HEALTH = "DELETE FROM health_daily WHERE date < ?"
+_HEALTH_SINCE = "SELECT date, metric, value FROM health_daily WHERE date >= ? ORDER BY date DESC"
+_PUT_FORECAST = "INSERT OR REPLACE INTO weather_forecasts (date, fetched_at, data) VALUES (?, ?, ?)"
+_FORECAST_BETWEEN = "SELECT date, data FROM weather_forecasts WHERE date BETWEEN ? AND ? ORDER BY date"
+_PUT_CACHE = "INSERT OR REPLACE INTO cache_entries (key, source, fetched_at, value) VALUES (?, ?, ?, ?)"
+_GET_CACHE = "SELECT value, fetched_at FROM cache_entries WHERE key = ?"
+_PRUNE_CACHE = "DELETE FROM cache_entries WHERE source = ? AND fetched_at < ?"
+_GET_META = "SELECT value FROM meta WHERE key = ?"
+_SET_META = "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)"
+
+
+class DataStore:
+    """SQLite database (WAL mode) holding the dashboard's history and cached upstream data.
+
+    Writes are queued to one writer thread and return a Future that resolves once committed; reads
+    run on pooled read-only connections in the calling thread.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._writes = queue.Queue()
+        self._readers = queue.LifoQueue()
+        ready = Future()
+        self._writer = threading.Thread(target=self._writer_loop, args=(ready,), name="datastore-writer",
+                                        daemon=True)
+        self._writer.start()
+        ready.result()  # Raises if the database could not be opened or migrated
+        atexit.register(self.close)
+
+    # --- Connections ---
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None,
+                               check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        return conn
+
+    def _writer_loop(self, ready: Future):
+        try:
+            conn = self._connect()
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")  # Durable across app crashes; WAL keeps the file intact
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.executescript(SCHEMA)
+        except Exception as e:
+            ready.set_exception(e)
+            return
+        ready.set_result(None)
+
+        while True:
+            item = self._writes.get()
+            if item is None:
+                break
+            work, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                result = work(conn)
+                conn.execute("COMMIT")
+                future.set_result(result)
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                print(f"[datastore] Write failed: {e}")
+                future.set_exception(e)
+        conn.close()
+
+    def _write(self, work) -> Future:
+        """Runs work(conn) in its own transaction on the writer thread."""
+        future = Future()
+        self._writes.put((work, future))
+        return future
+
+    @contextmanager
+    def _reader(self):
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+            conn.execute("PRAGMA query_only = ON")
+        try:
+            yield conn
+        finally:
+            if self._readers.qsize() < MAX_IDLE_READERS:
+                self._readers.put(conn)
+            else:
+                conn.close()
+
+    def query(self, sql: str, params=()) -> list:
+        with self._reader() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def close(self):
+        """Finishes queued writes and closes the writer connection."""
+        if self._writer.is_alive():
+            self._writes.put(None)
+            self._writer.join()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+
+    # --- Net worth ---
+
+    def record_portfolio(self, total: float, portfolio_details: dict, ts: float = None) -> Future:
+        """Stores a snapshot with every holding from a get_detailed_portfolio result."""
+        ts = time.time() if ts is None else ts
+        rows = []
+        for account in portfolio_details.get("fidelity", []):
+            for holding in account.get("holdings", []):
+                rows.append(("fidelity", account["name"], holding.get("symbol"), holding.get("value", 0.0),
+                             holding.get("pct_gain")))
+        for account in portfolio_details.get("non_fidelity", []):
+            rows.append(("non_fidelity", account["name"], None, account.get("value", 0.0), None))
+
+        def work(conn):
+            snapshot_id = conn.execute(_INSERT_SNAPSHOT, (ts, total)).lastrowid
+            conn.executemany(_INSERT_HOLDING, [(snapshot_id, position) + row for position, row in enumerate(rows)])
+            return snapshot_id
+        return self._write(work)
+
+    def latest_portfolio(self):
+        """The newest snapshot as portfolio details ({"total_value", "fidelity", "non_fidelity"}) plus
+        its epoch timestamp, or (None, None) if nothing was recorded yet."""
+        with self._reader() as conn:
+            snapshot = conn.execute(_LATEST_SNAPSHOT).fetchone()
+            if snapshot is None:
+                return None, None
+            snapshot_id, ts, total = snapshot
+            holdings = conn.execute(_SNAPSHOT_HOLDINGS, (snapshot_id,)).fetchall()
+
+        fidelity_accounts = {}
+        non_fidelity = []
+        for source, account, symbol, value, pct_gain in holdings:
+            if source == "fidelity":
+                fidelity_accounts.setdefault(account, []).append(
+                    {"symbol": symbol, "value": value, "pct_gain": pct_gain or 0.0})
+            else:
+                non_fidelity.append({"name": account, "value": value})
+        details = {
+            "total_value": total,
+            "fidelity": [{"name": name, "holdings": rows} for name, rows in fidelity_accounts.items()],
+            "non_fidelity": non_fidelity,
+        }
+        return details, ts
+
+    def networth_series(self, series: str, start: float = 0.0, end: float = None, rollup: str = "raw") -> dict:
+        """{"t": [...], "v": [...]} for a series ("total", "account:<name>" or
+        "holding:<account>/<symbol>") between start and end (epoch seconds).
+
+        Rollups keep the last snapshot of each local day, ISO week or calendar month. Raises
+        KeyError for a series that was never recorded.
+        """
+        if rollup not in ROLLUPS:
+            raise ValueError(f"Unknown rollup: {rollup}")
+        window = (start, time.time() if end is None else end)
+        kind, _, name = series.partition(":")
+        if series == "total":
+            rows = self.query(_TOTAL_BETWEEN, window)
+        elif kind == "account" and self.query(_ACCOUNT_EXISTS, (name,)):
+            rows = self.query(_ACCOUNT_BETWEEN, (name,) + window)
+        elif kind == "holding" and "/" in name:
+            account, _, symbol = name.rpartition("/")
+            if not self.query(_HOLDING_EXISTS, (account, symbol)):
+                raise KeyError(series)
+            rows = self.query(_HOLDING_BETWEEN, (account, symbol) + window)
+        else:
+            raise KeyError(series)
+
+        if rollup != "raw":
+            buckets = {}
+            for ts, value in rows:
+                buckets[_bucket_key(ts, rollup)] = (ts, value)
+            rows = list(buckets.values())
+        return {"t": [int(ts) for ts, _ in rows], "v": [round(value, 2) for _, value in rows]}
+
+    def networth_series_names(self) -> list:
+        names = {"total"}
+        for account, symbol in self.query(_SERIES_KEYS):
+            names.add(f"account:{account}")
+            if symbol is not None:
+                names.add(f"holding:{account}/{symbol}")
+        return sorted(names)
+
+    # --- Health ---
+
+    def put_health_days(self, days: dict, keep_since: str = None) -> Future:
+        """Replaces the metrics of each day in days ({'YYYY-MM-DD': {metric: value}}) and drops
+        days before keep_since."""
+        def work(conn):
+            for date, metrics in days.items():
+                conn.execute(_DELETE_HEALTH_DAY, (date,))
+                conn.executemany(_INSERT_HEALTH, [(date, metric, value) for metric, value in metrics.items()])
+            if keep_since:
+                conn.execute(_PRUNE_HEALTH, (keep_since,))
+        return self._write(work)
+
+    def health_history(self, since: str = "") -> list:
+        """[{'date', 'metrics'}] for days on or after since, newest first (the health_data.json shape)."""
+        history = []
+        for date, metric, value in self.query(_HEALTH_SINCE, (since,)):
+            if not history or history[-1]["date"] != date:
+                history.append({"date": date, "metrics": {}})
+            history[-1]["metrics"][metric] = value
+        return history
+
+    # --- Weather ---
+
+    def put_forecast(self, days: list, fetched_at: float = None) -> Future:
+        """Upserts forecast days (dicts with a 'date'); past days keep their last forecast."""
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        rows = [(day["date"], fetched_at, json.dumps(day, separators=(",", ":"))) for day in days if day]
+        return self._write(lambda conn: conn.executemany(_PUT_FORECAST, rows))
+
+    def forecast(self, first_date: str, last_date: str) -> dict:
+        """{'YYYY-MM-DD': day} for stored days between the two ISO dates, inclusive."""
+        return {date: json.loads(data) for date, data in self.query(_FORECAST_BETWEEN, (first_date, last_date))}
+
+    # --- Upstream cache (used as TTLCache backing) ---
+
+    def put_cache(self, key: str, value, fetched_at: float) -> Future:
+        row = (key, key.split(":", 1)[0], fetched_at, json.dumps(value, separators=(",", ":")))
+        return self._write(lambda conn: conn.execute(_PUT_CACHE, row))
+
+    def get_cache(self, key: str):
+        """(value, fetched_at) of a cached entry, or None."""
+        rows = self.query(_GET_CACHE, (key,))
+        if not rows:
+            return None
+        value, fetched_at = rows[0]
+        return json.loads(value), fetched_at
+
+    def prune_cache(self, source: str, older_than: float) -> Future:
+        """Deletes entries of source (the key prefix before ':') fetched before older_than."""
+        return self._write(lambda conn: conn.execute(_PRUNE_CACHE, (source, older_than)))
+
+    # --- Markers ---
+
+    def get_meta(self, key: str):
+        rows = self.query(_GET_META, (key,))
+        return rows[0][0] if rows else None
+
+    def set_meta(self, key: str, value: str) -> Future:
+        return self._write(lambda conn: conn.execute(_SET_META, (key, value)))
+
+
+def _bucket_key(ts: float, rollup: str):
+    day = datetime.fromtimestamp(ts).date()
+    if rollup == "daily":
+        return day
+    if rollup == "weekly":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def read_legacy_series_file(path: str, index_path: str) -> list:
+    """Snapshots from the networth_history.bin series file older versions wrote, as
+    [(ts, total, portfolio_details)], so they can be moved into the datastore."""
+    import numpy as np
+    record_dtype = np.dtype([("ts", "<f8"), ("series", "<u4"), ("value", "<f8")])
+    with open(index_path) as f:
+        names = {series_id: name for name, series_id in json.load(f).items()}
+    with open(path, "rb") as f:
+        data = f.read()
+    records = np.frombuffer(data, dtype=record_dtype, count=len(data) // record_dtype.itemsize)
+
+    snapshots = {}  # ts -> {series name: value}; one append wrote every series at the same ts
+    for ts, series_id, value in records.tolist():
+        snapshots.setdefault(ts, {})[names.get(series_id)] = value
+
+    result = []
+    for ts, values in sorted(snapshots.items()):
+        if "total" not in values:
+            continue
+        fidelity = {}
+        for name, value in values.items():
+            if name and name.startswith("holding:"):
+                account, _, symbol = name[len("holding:"):].rpartition("/")
+                fidelity.setdefault(account, []).append({"symbol": symbol, "value": value})
+        non_fidelity = [{"name": name[len("account:"):], "value": value} for name, value in values.items()
+                        if name and name.startswith("account:") and name[len("account:"):] not in fidelity]
+        result.append((ts, values["total"], {
+            "fidelity": [{"name": account, "holdings": holdings} for account, holdings in fidelity.items()],
+            "non_fidelity": non_fidelity,
+        }))
+    return result
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> DataStore:
+    """The process-wide store at DASHBOARD_DB (default Host/dashboard.db), opened on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DataStore(os.environ.get("DASHBOARD_DB", DEFAULT_PATH))
+        return _store
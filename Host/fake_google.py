@@ -0,0 +1,125 @@
+# fake_google.py - In-memory stand-in for the Google Calendar API, for running offline
+import datetime
+import itertools
+import threading
+
+SYNC_TOKEN_PREFIX = "fake-sync-"
+
+
+class FakeHttpError(Exception):
+    """Mimics googleapiclient.errors.HttpError closely enough for status checks (error.resp.status)."""
+
+    class _Resp:
+        def __init__(self, status):
+            self.status = status
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"<HttpError {status}: {message}>")
+        self.resp = self._Resp(status)
+
+
+class _Request:
+    def __init__(self, fn):
+        self._fn = fn
+
+    def execute(self):
+        return self._fn()
+
+
+class _Events:
+    def __init__(self, service):
+        self._service = service
+
+    def list(self, **params):
+        return _Request(lambda: self._service._list(**params))
+
+    def insert(self, calendarId, body):
+        return _Request(lambda: self._service.put_event(calendarId, body))
+
+
+class FakeCalendarService:
+    """Implements the slice of events() the dashboard uses: list (with timeMin, paging and sync
+    tokens) and insert.
+
+    Every change bumps a sequence number; a sync token is the sequence it was issued at, so an
+    incremental list returns exactly the events changed since, including cancelled ones. Tokens
+    issued before expire_tokens() was called answer 410 like the real API.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+        self._calendars = {}  # calendar id -> {event id -> (seq, event)}
+        self._oldest_valid_token = 0
+        self._last_seq = 0
+
+    def events(self):
+        return _Events(self)
+
+    def put_event(self, calendar_id: str, event: dict) -> dict:
+        """Adds or replaces an event (an id is assigned when missing)."""
+        with self._lock:
+            self._last_seq = next(self._seq)
+            event_id = event.get("id") or f"evt{self._last_seq}"
+            event = dict(event, id=event_id, iCalUID=event.get("iCalUID") or f"{event_id}@fake",
+                         status=event.get("status", "confirmed"))
+            self._calendars.setdefault(calendar_id, {})[event["id"]] = (self._last_seq, event)
+            return event
+
+    def delete_event(self, calendar_id: str, event_id: str):
+        with self._lock:
+            _, event = self._calendars[calendar_id][event_id]
+            self._last_seq = next(self._seq)
+            self._calendars[calendar_id][event_id] = (self._last_seq, dict(event, status="cancelled"))
+
+    def expire_tokens(self):
+        with self._lock:
+            self._oldest_valid_token = self._last_seq + 1
+
+    def _list(self, calendarId, syncToken=None, timeMin=None, pageToken=None, maxResults=250, **_):
+        with self._lock:
+            entries = sorted(self._calendars.get(calendarId, {}).values(), key=lambda e: e[0])
+            if syncToken is not None:
+                since = int(syncToken[len(SYNC_TOKEN_PREFIX):])
+                if since < self._oldest_valid_token:
+                    raise FakeHttpError(410, "Sync token is no longer valid, a full sync is required.")
+                items = [event for seq, event in entries if seq > since]
+            else:
+                items = [event for _, event in entries
+                         if event["status"] != "cancelled" and (timeMin is None or _start_of(event) >= timeMin)]
+
+            offset = int(pageToken or 0)
+            page = items[offset:offset + maxResults]
+            result = {"items": [dict(event) for event in page]}
+            if offset + maxResults < len(items):
+                result["nextPageToken"] = str(offset + maxResults)
+            else:
+                result["nextSyncToken"] = f"{SYNC_TOKEN_PREFIX}{self._last_seq}"
+            return result
+
+
+def _start_of(event: dict) -> str:
+    """Comparable ISO start of an event (all-day events start at local midnight, compared naively)."""
+    start = event["start"]
+    if "dateTime" in start:
+        return start["dateTime"]
+    return f"{start['date']}T00:00:00"
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def calendar_service() -> FakeCalendarService:
+    """The process-wide fake, seeded with a few events around today on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = FakeCalendarService()
+            today = datetime.date.today()
+            for offset, title, at in ((0, "Standup", "09:30"), (1, "Dentist", "14:00"),
+                                      (4, "Team offsite", None), (10, "Flight home", "07:15")):
+                day = today + datetime.timedelta(days=offset)
+                start = {"date": day.isoformat()} if at is None else {"dateTime": f"{day.isoformat()}T{at}:00-05:00"}
+                _service.put_event("primary", {"summary": title, "start": start})
+        return _service
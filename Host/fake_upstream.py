@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# fake_upstream.py - Local stand-in for Open-Meteo, the news feed and the dashboard host, for running offline
+#
+# Usage (from Host/):
+#   python fake_upstream.py --port 8099 [--latency-ms 50] [--fail-every 3]
+#   OPEN_METEO_URL=http://127.0.0.1:8099/v1/forecast NEWS_RSS_URL=http://127.0.0.1:8099/news/rss.xml python app.py
+#   DASHBOARD_HOST_URL=http://127.0.0.1:8099/ python ../Display/raspberrypi_client.py
+import argparse
+import datetime
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RSS_ITEMS = ("Talks resume after overnight session", "VIDEO: Storm makes landfall", "Election count continues",
+             "Summit ends without agreement", "Ceasefire holds for a third day", "Markets steady ahead of vote")
+
+
+def forecast_payload(days: int = 7) -> dict:
+    """Open-Meteo /v1/forecast daily response for the next days, shaped like the real one."""
+    today = datetime.date.today()
+    return {"daily": {
+        "time": [(today + datetime.timedelta(days=i)).isoformat() for i in range(days)],
+        "temperature_2m_max": [60.4 + i for i in range(days)],
+        "temperature_2m_min": [45.1 + i for i in range(days)],
+        "weathercode": [(0, 2, 3, 61, 71, 95, 45)[i % 7] for i in range(days)],
+        "uv_index_max": [3.5] * days,
+        "snowfall_sum": [0.0] * days,
+    }}
+
+
+def rss_payload() -> bytes:
+    items = "".join(f"<item><title>{title}</title></item>" for title in RSS_ITEMS)
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Fake</title>{items}</channel></rss>'.encode()
+
+
+class FakeUpstreamServer(ThreadingHTTPServer):
+    """Serves /v1/forecast, /news/rss.xml, / and /api/battery over HTTP/1.1 keep-alive.
+
+    Every fail_every-th request answers 503 (to exercise retries), and /stats reports how many
+    requests arrived over how many TCP connections, which shows whether clients reuse them.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), latency_ms: float = 0, fail_every: int = 0):
+        super().__init__(address, _Handler)
+        self.latency = latency_ms / 1000
+        self.fail_every = fail_every
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.batteries = []
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeUpstreamServer":
+        """Serves on a background thread (for use from tests and benchmarks)."""
+        threading.Thread(target=self.serve_forever, name="fake-upstream", daemon=True).start()
+        return self
+
+    def _next_request_fails(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            return bool(self.fail_every) and next(self._counter) % self.fail_every == 0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real upstreams
+    disable_nagle_algorithm = True  # Headers and body go out in separate writes; don't stall on delayed ACKs
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b"", content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _respond(self, handler):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server._next_request_fails():
+            self._send(503, b'{"error": "injected failure"}')
+            return
+        handler()
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/v1/forecast":
+            self._respond(lambda: self._send(200, json.dumps(forecast_payload()).encode()))
+        elif path == "/news/rss.xml":
+            self._respond(lambda: self._send(200, rss_payload(), "application/rss+xml"))
+        elif path == "/":
+            self._respond(lambda: self._send(200, b"<html>fake dashboard</html>", "text/html"))
+        elif path == "/stats":
+            server = self.server
+            self._send(200, json.dumps({"requests": server.requests, "connections": server.connections,
+                                        "batteries": server.batteries}).encode())
+        else:
+            self._send(404, b'{"error": "not found"}')
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path == "/api/battery":
+            def record():
+                self.server.batteries.append(json.loads(body or b"{}").get("level"))
+                self._send(200, b'{"status": "ok"}')
+            self._respond(record)
+        else:
+            self._send(404, b'{"error": "not found"}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Open-Meteo / news / dashboard host server")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay added to every response")
+    parser.add_argument("--fail-every", type=int, default=0, help="Answer every Nth request with 503")
+    args = parser.parse_args()
+
+    server = FakeUpstreamServer(("127.0.0.1", args.port), args.latency_ms, args.fail_every)
+    print(f"[fake_upstream] Serving on {server.url} (forecast: {server.url}/v1/forecast, "
+          f"news: {server.url}/news/rss.xml, stats: {server.url}/stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
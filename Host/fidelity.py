@@ -3,7 +3,9 @@ import traceback
 import json
 import re
 import time
+from contextlib import contextmanager
 from bs4 import BeautifulSoup
+from fidelity_parsers import clean_number, get_positions_parser
 
 import pyotp
 import typing
@@ -14,6 +16,163 @@ from playwright_stealth import StealthConfig, stealth_sync
 from enum import Enum
 
 
+LOADING_SPINNER_SELECTORS = [
+    "div:nth-child(2) > .loading-spinner-mask-after",
+    ".pvd-spinner__mask-inner",
+    "pvd-loading-spinner",
+    ".pvd3-spinner-root > .pvd-spinner__spinner",
+]
+
+# Evaluated in the page: true once no spinner is visible (all selectors checked in one poll)
+_SPINNERS_HIDDEN_JS = """
+(selectors) => selectors.every(sel => {
+    const el = document.querySelector(sel);
+    if (!el) return true;
+    return el.getClientRects().length === 0 || getComputedStyle(el).visibility === 'hidden';
+})
+"""
+
+# Evaluated in the page: true once selector matches at least one element and the match count
+# has not changed for stableMs (AG Grid renders rows in batches).
+_COUNT_STABLE_JS = """
+({ selector, stableMs }) => {
+    const count = document.querySelectorAll(selector).length;
+    const now = Date.now();
+    const key = '__readiness_' + selector;
+    const seen = window[key];
+    if (!seen || seen.count !== count) {
+        window[key] = { count: count, since: now };
+        return false;
+    }
+    return count > 0 && now - seen.since >= stableMs;
+}
+"""
+
+_TEXT_HAS_DIGIT_JS = """
+(selector) => {
+    const el = document.querySelector(selector);
+    return !!el && /[0-9]/.test(el.textContent || '');
+}
+"""
+
+
+POSITIONS_URL = "https://digital.fidelity.com/ftgw/digital/portfolio/positions"
+BALANCES_URL = "https://digital.fidelity.com/ftgw/digital/portfolio/balances"
+
+# The positions/balances pages hydrate from JSON XHRs. Responses whose URL contains one of these
+# fragments are captured and parsed by key, so column order on the page doesn't matter.
+POSITIONS_RESPONSE_PATTERNS = ("position",)
+BALANCES_RESPONSE_PATTERNS = ("balance",)
+ACCOUNT_NAME_KEYS = ("acctName", "accountName", "acctNickName", "nickname", "name")
+ACCOUNT_NUMBER_KEYS = ("acctNum", "accountNumber", "acctNumber", "accountId")
+ACCOUNT_VALUE_KEYS = ("totalAccountValue", "acctValue", "accountValue", "balance", "marketValue")
+POSITION_SYMBOL_KEYS = ("symbol", "securitySymbol", "ticker")
+POSITION_VALUE_KEYS = ("currentValue", "marketValue", "mktVal", "value")
+POSITION_GAIN_KEYS = ("totalGainLoss", "totalGainLossDollar", "totalGain", "gainLoss")
+POSITION_COST_KEYS = ("costBasisTotal", "totalCostBasis", "costBasis")
+# Only read from the payload's top level or a *summary* node, since accounts carry a
+# totalAccountValue of their own
+TOTAL_BALANCE_KEYS = ("totalBalance", "totalNetWorth", "totalAccountValue")
+BALANCE_TOLERANCE = 1.0  # Dollars two parses of the same value may differ by
+# The key names above aren't confirmed by a captured payload yet, so the JSON is only used when it
+# agrees with the rendered page. FIDELITY_CAPTURE_DIR records a payload/page pair for
+# benchmarks/check_fidelity_payloads.py; flip this once a real capture passes it.
+TRUST_JSON_PAYLOADS = False
+CAPTURE_DIR_ENV = "FIDELITY_CAPTURE_DIR"
+
+
+def _to_float(value):
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        return clean_number(value)
+    if isinstance(value, dict):
+        for key in ("value", "amount", "val"):
+            if key in value:
+                return _to_float(value[key])
+    return None
+
+
+def _first(d: dict, keys, convert=None):
+    for key in keys:
+        if d.get(key) not in (None, ""):
+            return convert(d[key]) if convert else d[key]
+    return None
+
+
+def _iter_dicts(node):
+    """Yields every dict in a decoded JSON document, in document order."""
+    if isinstance(node, dict):
+        yield node
+        for child in node.values():
+            yield from _iter_dicts(child)
+    elif isinstance(node, list):
+        for child in node:
+            yield from _iter_dicts(child)
+
+
+def _is_account(d: dict) -> bool:
+    return _first(d, ACCOUNT_NAME_KEYS) is not None or _first(d, ACCOUNT_NUMBER_KEYS) is not None
+
+
+def _account_value(account: dict):
+    """The account's value, read from the account itself or its nested detail dicts."""
+    value = _first(account, ACCOUNT_VALUE_KEYS, _to_float)
+    if value is not None:
+        return value
+    for child in account.values():
+        if isinstance(child, dict) and not _is_account(child):
+            value = _account_value(child)
+            if value is not None:
+                return value
+    return None
+
+
+def _summary_nodes(payload):
+    """The payload's top-level dict and every non-account dict stored under a *summary* key."""
+    if isinstance(payload, dict) and not _is_account(payload):
+        yield payload
+    for d in _iter_dicts(payload):
+        for key, child in d.items():
+            if "summary" in key.lower() and isinstance(child, dict) and not _is_account(child):
+                yield child
+
+
+def _is_position(d) -> bool:
+    return (isinstance(d, dict) and _first(d, POSITION_SYMBOL_KEYS) is not None
+            and _first(d, POSITION_VALUE_KEYS, _to_float) is not None)
+
+
+def _is_fidelity_account_number(acc_id: str) -> bool:
+    return bool(re.match(r'^[XYZ]\d+$', acc_id) or (acc_id.isdigit() and len(acc_id) < 15))
+
+
+def empty_portfolio() -> dict:
+    return {"total_net_worth": 0.0, "fidelity_accounts": [], "non_fidelity_accounts": []}
+
+
+def _values_agree(a: dict, b: dict) -> bool:
+    return a.keys() == b.keys() and all(abs(a[k] - b[k]) <= BALANCE_TOLERANCE for k in a)
+
+
+def positions_agree(a: dict, b: dict) -> bool:
+    """True if both results hold the same accounts with the same symbols at the same values."""
+    def by_account(r):
+        return {acc["name"]: {h["symbol"]: h["value"] for h in acc["holdings"]} for acc in r["fidelity_accounts"]}
+    a, b = by_account(a), by_account(b)
+    return a.keys() == b.keys() and all(_values_agree(a[name], b[name]) for name in a)
+
+
+def balances_agree(a: dict, b: dict) -> bool:
+    """True if both results have the same total and the same outside accounts."""
+    def external(r):
+        return {acc["name"]: acc["value"] for acc in r["non_fidelity_accounts"]}
+    return (abs(a["total_net_worth"] - b["total_net_worth"]) <= BALANCE_TOLERANCE
+            and _values_agree(external(a), external(b)))
+
+
 class fid_months(Enum):
     Jan = 1
     Feb = 2
@@ -29,39 +188,53 @@ class fid_months(Enum):
     Dec = 12
 
 
+def fidelity_profile_path(profile_path: str = ".", title: str = None) -> str:
+    """Path of the saved Fidelity session (cookies/local storage) used as the browser storage state."""
+    filename = f"Fidelity_{title}.json" if title is not None else "Fidelity.json"
+    return os.path.join(os.path.abspath(profile_path), filename)
+
+
 class FidelityAutomation:
     def __init__(self, headless: bool = True, debug: bool = False, title: str = None, source_account: str = None,
-                 save_state: bool = True, profile_path: str = ".") -> None:
+                 save_state: bool = True, profile_path: str = ".", context=None, parser_backend: str = None) -> None:
+        """If context is given (e.g. from BrowserManager), pages are opened in that existing
+        browser context and close_browser() leaves the browser running for the next fetch.
+        parser_backend picks the positions HTML parser (see fidelity_parsers); None = fastest installed."""
         self.headless: bool = headless
         self.title: str = title
         self.save_state: bool = save_state
         self.debug = debug
         self.profile_path: str = profile_path
+        self.parser_backend = parser_backend
         self.stealth_config = StealthConfig(
             navigator_languages=False,
             navigator_user_agent=False,
             navigator_vendor=False,
         )
-        self.getDriver()
+        self.owns_browser: bool = context is None
+        if self.owns_browser:
+            self.getDriver()
+        else:
+            self.attachToContext(context)
         self.account_dict: dict = {}
         self.source_account = source_account
         self.new_account_number = None
+        self.wait_timings: list = []  # (wait name, seconds actually spent)
         self.page.set_default_navigation_timeout(360000)
         self.page.set_default_timeout(360000)
 
-    def getDriver(self):
-        self.playwright = sync_playwright().start()
+    def _prepare_profile_path(self):
         if self.save_state:
-            self.profile_path = os.path.abspath(self.profile_path)
-            if self.title is not None:
-                self.profile_path = os.path.join(self.profile_path, f"Fidelity_{self.title}.json")
-            else:
-                self.profile_path = os.path.join(self.profile_path, "Fidelity.json")
+            self.profile_path = fidelity_profile_path(self.profile_path, self.title)
             if not os.path.exists(self.profile_path):
                 os.makedirs(os.path.dirname(self.profile_path), exist_ok=True)
                 with open(self.profile_path, "w") as f:
                     json.dump({}, f)
 
+    def getDriver(self):
+        self.playwright = sync_playwright().start()
+        self._prepare_profile_path()
+
         self.browser = self.playwright.firefox.launch(
             headless=self.headless,
             args=["--disable-webgl", "--disable-software-rasterizer"],
@@ -75,6 +248,14 @@ class FidelityAutomation:
         self.page = self.context.new_page()
         stealth_sync(self.page, self.stealth_config)
 
+    def attachToContext(self, context):
+        self.playwright = None
+        self.browser = context.browser
+        self.context = context
+        self._prepare_profile_path()
+        self.page = self.context.new_page()
+        stealth_sync(self.page, self.stealth_config)
+
     def login(self, username: str, password: str, totp_secret: str = None, save_device: bool = True) -> bool:
         try:
             self.page.goto("https://digital.fidelity.com/prgw/digital/login/full-page", timeout=600000)
@@ -91,7 +272,7 @@ class FidelityAutomation:
             self.page.get_by_role("button", name="Log in").click()
 
             self.wait_for_loading_sign()
-            self.page.wait_for_timeout(5000)
+            self.wait_for_post_login()
             self.wait_for_loading_sign()
 
             if "summary" in self.page.url:
@@ -156,171 +337,266 @@ class FidelityAutomation:
             print(f"An error occurred: {str(e)}")
             return False
 
-    def wait_for_loading_sign(self, timeout: int = 30000):
-        signs = [self.page.locator("div:nth-child(2) > .loading-spinner-mask-after").first,
-                 self.page.locator(".pvd-spinner__mask-inner").first,
-                 self.page.locator("pvd-loading-spinner").first,
-                 self.page.locator(".pvd3-spinner-root > .pvd-spinner__spinner").first]
-        for sign in signs:
+    @contextmanager
+    def _timed_wait(self, name: str):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.wait_timings.append((name, time.monotonic() - start))
+
+    def _wait_for_js(self, name: str, expression: str, arg=None, timeout: int = 30000, page=None) -> bool:
+        """Polls a JS predicate in the page; returns False (instead of raising) on timeout."""
+        page = page or self.page
+        with self._timed_wait(name):
             try:
-                sign.wait_for(timeout=timeout, state="hidden")
-            except:
-                pass
+                page.wait_for_function(expression, arg=arg, timeout=timeout, polling=200)
+                return True
+            except PlaywrightTimeoutError:
+                if self.debug:
+                    print(f"Readiness wait '{name}' timed out after {timeout} ms")
+                return False
+
+    def wait_for_loading_sign(self, timeout: int = 30000, page=None):
+        """Waits until none of the known loading spinners are visible. All spinner selectors
+        are checked together in each poll rather than one after another."""
+        self._wait_for_js("spinners", _SPINNERS_HIDDEN_JS, arg=LOADING_SPINNER_SELECTORS, timeout=timeout, page=page)
+
+    def wait_for_stable_count(self, name: str, selector: str, stable_ms: int = 1000, timeout: int = 30000,
+                              page=None) -> bool:
+        return self._wait_for_js(name, _COUNT_STABLE_JS, arg={"selector": selector, "stableMs": stable_ms},
+                                 timeout=timeout, page=page)
+
+    def wait_for_text_value(self, name: str, selector: str, timeout: int = 30000, page=None) -> bool:
+        return self._wait_for_js(name, _TEXT_HAS_DIGIT_JS, arg=selector, timeout=timeout, page=page)
+
+    def wait_for_network_idle(self, timeout: int = 10000, page=None) -> bool:
+        page = page or self.page
+        with self._timed_wait("network_idle"):
+            try:
+                page.wait_for_load_state("networkidle", timeout=timeout)
+                return True
+            except PlaywrightTimeoutError:
+                return False
+
+    def wait_for_post_login(self, timeout: int = 5000):
+        """After submitting credentials: returns as soon as we land on the summary page or the
+        2FA widget renders, instead of always sleeping the full timeout."""
+        self._wait_for_js("post_login",
+                          "() => location.href.includes('summary') || !!document.querySelector('#dom-widget div')",
+                          timeout=timeout)
+
+    def log_wait_timings(self):
+        if self.wait_timings:
+            summary = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in self.wait_timings)
+            print(f"Readiness waits: {summary}")
 
     def get_detailed_portfolio(self):
-        result = {"total_net_worth": 0.0, "fidelity_accounts": [], "non_fidelity_accounts": []}
+        result = empty_portfolio()
+        balances_page = None
 
         try:
-            # 1. POSITIONS PAGE
-            print("Navigating to Positions...")
-            self.page.goto("https://digital.fidelity.com/ftgw/digital/portfolio/positions", timeout=60000)
+            # Open both pages in the same authenticated context and start both navigations before
+            # waiting on either, so the browser loads them concurrently.
+            print("Navigating to Positions and Balances (parallel tabs)...")
+            balances_page = self.context.new_page()
+            stealth_sync(balances_page, self.stealth_config)
+            positions_responses = self._capture_json_responses(self.page, POSITIONS_RESPONSE_PATTERNS)
+            balances_responses = self._capture_json_responses(balances_page, BALANCES_RESPONSE_PATTERNS)
+            self.page.goto(POSITIONS_URL, wait_until="commit", timeout=60000)
+            balances_page.goto(BALANCES_URL, wait_until="commit", timeout=60000)
+
+            # 1. POSITIONS PAGE - the JSON the grid is built from, checked against the grid itself
             self.wait_for_loading_sign(timeout=60000)
-            self.page.wait_for_timeout(8000)
-
-            content = self.page.content()
-            soup = BeautifulSoup(content, 'html.parser')
-
-            pinned_container = soup.find('div', {'class': 'ag-pinned-left-cols-container'}) or soup.select_one(
-                '.ag-pinned-left-cols-container')
-            center_container = soup.find('div', {'class': 'ag-center-cols-container'}) or soup.select_one(
-                '.ag-center-cols-container')
-
-            if not pinned_container or not center_container:
-                print("Could not find grid containers.")
-                return result
-
-            pinned_rows = pinned_container.find_all('div', {'role': 'row'})
-            center_rows = center_container.find_all('div', {'role': 'row'})
-            center_map = {row.get('row-id'): row for row in center_rows}
-
-            current_account = None
-            account_holdings = []
-
-            def clean_number(txt):
-                if not txt or txt == '--': return 0.0
-                match = re.search(r'([+\-]?[0-9,]+(\.[0-9]+)?)', txt)
-                if match:
-                    clean_str = match.group(1).replace(',', '').replace('+', '')
-                    try:
-                        return float(clean_str)
-                    except:
-                        return 0.0
-                return 0.0
-
-            for p_row in pinned_rows:
-                row_id = p_row.get('row-id')
-                classes = p_row.get('class', [])
-
-                if 'posweb-row-account' in classes:
-                    if current_account and account_holdings:
-                        self._merge_and_add_account(result, current_account, account_holdings)
-
-                    account_name_el = p_row.select_one('.posweb-cell-account_primary')
-                    if account_name_el:
-                        current_account = account_name_el.get_text(strip=True)
-                    else:
-                        current_account = p_row.get_text(strip=True)
-                    account_holdings = []
-                    continue
+            self.wait_for_network_idle()
+            payloads = self._decode_json_responses(positions_responses)
+            from_json = empty_portfolio()
+            json_ok = self._parse_positions_payload(payloads, from_json)
+            if not (json_ok and TRUST_JSON_PAYLOADS):
+                self.wait_for_stable_count("positions_grid", ".ag-center-cols-container [role='row']", timeout=30000)
+                content = self.page.content()
+                self._capture("positions", payloads, content)
+                self._parse_positions(content, result)
+                json_ok = json_ok and self._json_agrees("Positions", positions_agree(from_json, result))
+            if json_ok:
+                print("Positions parsed from JSON responses.")
+                result['fidelity_accounts'] = from_json['fidelity_accounts']
+
+            # 2. BALANCES PAGE (kept loading in its own tab meanwhile)
+            self.wait_for_loading_sign(timeout=60000, page=balances_page)
+            self.wait_for_network_idle(page=balances_page)
+            payloads = self._decode_json_responses(balances_responses)
+            from_json = empty_portfolio()
+            json_ok = self._parse_balances_payload(payloads, from_json)
+            if not (json_ok and TRUST_JSON_PAYLOADS):
+                self.wait_for_text_value("total_balance", "div.total-balance__value", timeout=30000,
+                                         page=balances_page)
+                self.wait_for_stable_count("balance_rows", "div.expand-header-section", stable_ms=500,
+                                           timeout=15000, page=balances_page)
+                content = balances_page.content()
+                self._capture("balances", payloads, content)
+                self._parse_balances(content, result)
+                json_ok = json_ok and self._json_agrees("Balances", balances_agree(from_json, result))
+            if json_ok:
+                print("Balances parsed from JSON responses.")
+                result['total_net_worth'] = from_json['total_net_worth']
+                result['non_fidelity_accounts'] = from_json['non_fidelity_accounts']
 
-                if 'posweb-row-position' in classes and current_account:
-                    sym_el = p_row.select_one('.posweb-cell-symbol-name_container span')
-                    if not sym_el: continue
-                    symbol = sym_el.get_text(strip=True)
-
-                    c_row = center_map.get(row_id)
-                    if not c_row: continue
-
-                    # SIMPLIFIED PARSING USING EXACT COLUMN INDICES (0-indexed)
-                    # Index 4: Total Gain $
-                    # Index 5: Total Gain % (6th gridcell)
-                    # Index 6: Current Value (7th gridcell)
-                    # Index 10: Cost Basis Total (11th gridcell) - backup for calculation
-
-                    cells = c_row.find_all('div', {'role': 'gridcell'})
-
-                    val_raw = ""
-                    pct_raw = ""
-                    gain_dol_raw = ""
-                    cost_raw = ""
-
-                    if len(cells) > 6:
-                        # Safety check
-                        try:
-                            gain_dol_raw = cells[4].get_text(" ", strip=True)  # 5th cell
-                            pct_raw = cells[5].get_text(" ", strip=True)  # 6th cell
-                            val_raw = cells[6].get_text(" ", strip=True)  # 7th cell
-                            if len(cells) > 10:
-                                cost_raw = cells[10].get_text(" ", strip=True)  # 11th cell
-                        except Exception as parse_err:
-                            print(f"DEBUG: Error accessing cells for {symbol}: {parse_err}")
-
-                    val = clean_number(val_raw)
-                    pct = clean_number(pct_raw)
-                    gain_dol = clean_number(gain_dol_raw)
-                    cost = clean_number(cost_raw)
-
-                    # Debug prints for verification
-                    if gain_dol == 0.0 and val > 0:
-                        print(
-                            f"DEBUG: {symbol} Gain$ 0. Raw: '{gain_dol_raw}', CostRaw: '{cost_raw}', PctRaw: '{pct_raw}'")
-
-                    account_holdings.append({
-                        "symbol": symbol,
-                        "value": val,
-                        "pct_gain": pct,
-                        "gain_dollar": gain_dol,
-                        "cost_basis_raw": cost
-                    })
+        except Exception as e:
+            print(f"Detailed portfolio fetch failed: {e}")
+            traceback.print_exc()
+        finally:
+            if balances_page:
+                try:
+                    balances_page.close()
+                except Exception:
+                    pass
 
-            if current_account and account_holdings:
-                self._merge_and_add_account(result, current_account, account_holdings)
+        self.log_wait_timings()
+        return result
 
-            # 2. BALANCES PAGE
-            print("Navigating to Balances...")
-            self.page.goto("https://digital.fidelity.com/ftgw/digital/portfolio/balances", timeout=60000)
-            self.wait_for_loading_sign(timeout=60000)
-            self.page.wait_for_timeout(5000)
+    def _capture_json_responses(self, page, patterns) -> list:
+        """Starts collecting responses whose URL matches patterns. Bodies are read later, after
+        the page has settled, rather than inside the event callback."""
+        captured = []
 
-            content_bal = self.page.content()
-            soup_bal = BeautifulSoup(content_bal, 'html.parser')
+        def on_response(response):
+            url = response.url.lower()
+            if any(p in url for p in patterns):
+                captured.append(response)
 
-            nw_el = soup_bal.select_one('div.total-balance__value')
-            if nw_el:
-                result['total_net_worth'] = clean_number(nw_el.get_text(strip=True))
+        page.on("response", on_response)
+        return captured
 
-            balance_rows = soup_bal.select('div.expand-header-section')
+    def _decode_json_responses(self, responses) -> list:
+        payloads = []
+        for response in responses:
+            try:
+                if response.ok and "json" in (response.headers.get("content-type") or ""):
+                    payloads.append(response.json())
+            except Exception as e:
+                if self.debug:
+                    print(f"Could not decode {response.url}: {e}")
+        return payloads
+
+    @staticmethod
+    def _json_agrees(label: str, agrees: bool) -> bool:
+        if not agrees:
+            print(f"{label} JSON disagrees with the rendered page; using the page.")
+        return agrees
+
+    @staticmethod
+    def _capture(kind: str, payloads: list, content: str):
+        """Saves the JSON payloads and rendered page to $FIDELITY_CAPTURE_DIR as <kind>.json/.html."""
+        capture_dir = os.environ.get(CAPTURE_DIR_ENV)
+        if not capture_dir:
+            return
+        os.makedirs(capture_dir, exist_ok=True)
+        with open(os.path.join(capture_dir, f"{kind}.json"), "w", encoding="utf-8") as f:
+            json.dump(payloads, f, indent=1)
+        with open(os.path.join(capture_dir, f"{kind}.html"), "w", encoding="utf-8") as f:
+            f.write(content)
+        print(f"Captured {kind} JSON and page to {capture_dir}.")
+
+    def _parse_positions_payload(self, payloads, result) -> bool:
+        """Fills result['fidelity_accounts'] from captured positions JSON. Returns False if no
+        account with positions was found, so the caller can fall back to the HTML grid."""
+        seen = set()  # The page may re-request positions; keep the first copy of each account
+        for payload in payloads:
+            for account in _iter_dicts(payload):
+                name = _first(account, ACCOUNT_NAME_KEYS)
+                if not isinstance(name, str) or name in seen:
+                    continue
+                positions = next((v for v in account.values()
+                                  if isinstance(v, list) and v and all(_is_position(p) for p in v)), None)
+                if not positions:
+                    continue
 
-            for row in balance_rows:
-                try:
-                    name_el = row.select_one('.expand-header-section__title span.pvd-link__text')
-                    if not name_el: continue
-                    name = name_el.get_text(strip=True)
-
-                    desc_el = row.select_one('.expand-header-section__sectiontitle-description')
-                    acc_id = desc_el.get_text(strip=True) if desc_el else ""
-
-                    is_fidelity = False
-                    if re.match(r'^[XYZ]\d+$', acc_id) or (acc_id.isdigit() and len(acc_id) < 15):
-                        is_fidelity = True
-
-                    if not is_fidelity:
-                        val_el = row.select_one(
-                            '.expand-header-section__center-content__amount div[data-testid*="totalaccountvalue-label"]')
-                        if val_el:
-                            val = clean_number(val_el.get_text(strip=True))
-                            result['non_fidelity_accounts'].append({
-                                "name": name,
-                                "value": val
-                            })
-                except:
+                holdings = []
+                for position in positions:
+                    value = _first(position, POSITION_VALUE_KEYS, _to_float) or 0.0
+                    gain = _first(position, POSITION_GAIN_KEYS, _to_float) or 0.0
+                    cost = _first(position, POSITION_COST_KEYS, _to_float) or 0.0
+                    basis = cost if cost > 0 else value - gain
+                    holdings.append({
+                        "symbol": str(_first(position, POSITION_SYMBOL_KEYS)),
+                        "value": value,
+                        "pct_gain": gain / basis * 100 if basis else 0.0,
+                        "gain_dollar": gain,
+                        "cost_basis_raw": cost
+                    })
+                self._merge_and_add_account(result, name, holdings)
+                seen.add(name)
+        return bool(seen)
+
+    def _parse_balances_payload(self, payloads, result) -> bool:
+        """Fills result['total_net_worth'] and result['non_fidelity_accounts'] from captured
+        balances JSON. Returns False if no total was found or it doesn't match its accounts."""
+        total = None
+        accounts = {}  # (name, number) -> value; the page may re-request balances
+        for payload in payloads:
+            for node in _summary_nodes(payload):
+                if total is None:
+                    total = _first(node, TOTAL_BALANCE_KEYS, _to_float)
+            for d in _iter_dicts(payload):
+                name = _first(d, ACCOUNT_NAME_KEYS)
+                acc_id = _first(d, ACCOUNT_NUMBER_KEYS)
+                if not isinstance(name, str) or acc_id is None or (name, str(acc_id)) in accounts:
                     continue
+                value = _account_value(d)
+                if value is not None:
+                    accounts[(name, str(acc_id))] = value
 
-        except Exception as e:
-            print(f"Detailed portfolio fetch failed: {e}")
-            traceback.print_exc()
+        if total is None:
+            return False
+        if abs(sum(accounts.values()) - total) > BALANCE_TOLERANCE:
+            print(f"Balances JSON total {total:,.2f} doesn't match its accounts "
+                  f"({sum(accounts.values()):,.2f}); ignoring it.")
+            return False
+        result['total_net_worth'] = total
+        result['non_fidelity_accounts'].extend(
+            {"name": name, "value": value} for (name, acc_id), value in accounts.items()
+            if not _is_fidelity_account_number(acc_id))
+        return True
 
-        return result
+    def _parse_positions(self, content, result):
+        """Fills result['fidelity_accounts'] from the rendered positions grid."""
+        parse = get_positions_parser(self.parser_backend)
+        for account_name, raw_holdings in parse(content):
+            self._merge_and_add_account(result, account_name, raw_holdings)
+
+    def _parse_balances(self, content, result):
+        """Fills result['total_net_worth'] and result['non_fidelity_accounts'] from the balances page."""
+        soup_bal = BeautifulSoup(content, 'html.parser')
+
+        nw_el = soup_bal.select_one('div.total-balance__value')
+        if nw_el:
+            result['total_net_worth'] = clean_number(nw_el.get_text(strip=True))
+
+        balance_rows = soup_bal.select('div.expand-header-section')
+
+        for row in balance_rows:
+            try:
+                name_el = row.select_one('.expand-header-section__title span.pvd-link__text')
+                if not name_el: continue
+                name = name_el.get_text(strip=True)
+
+                desc_el = row.select_one('.expand-header-section__sectiontitle-description')
+                acc_id = desc_el.get_text(strip=True) if desc_el else ""
+
+                is_fidelity = _is_fidelity_account_number(acc_id)
+
+                if not is_fidelity:
+                    val_el = row.select_one(
+                        '.expand-header-section__center-content__amount div[data-testid*="totalaccountvalue-label"]')
+                    if val_el:
+                        val = clean_number(val_el.get_text(strip=True))
+                        result['non_fidelity_accounts'].append({
+                            "name": name,
+                            "value": val
+                        })
+            except:
+                continue
 
     def _merge_and_add_account(self, result_dict, account_name, raw_holdings):
         merged = {}
@@ -365,6 +641,10 @@ class FidelityAutomation:
 
     def close_browser(self):
         self.save_storage_state()
+        if not self.owns_browser:
+            # Shared context: only close our page and keep the warm browser for the next run
+            self.page.close()
+            return
         self.context.close()
         self.browser.close()
         self.playwright.stop()
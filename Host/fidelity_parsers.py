@@ -0,0 +1,146 @@
+# fidelity_parsers.py - Interchangeable parsers for Fidelity's rendered positions grid
+import re
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html as lxml_html
+except ImportError:
+    lxml_html = None
+
+_find_number = re.compile(r'[+\-]?[0-9,]+(?:\.[0-9]+)?').search
+
+# Column indices (0-indexed) of the center grid cells we read
+GAIN_DOLLAR_CELL = 4  # Total Gain $
+GAIN_PCT_CELL = 5     # Total Gain %
+VALUE_CELL = 6        # Current Value
+COST_BASIS_CELL = 10  # Cost Basis Total - backup for calculation
+
+
+def clean_number(txt):
+    if not txt or txt == '--': return 0.0
+    match = _find_number(txt)
+    if match:
+        try:
+            # float() accepts a leading '+', so only the thousands separators need removing
+            return float(match.group().replace(',', ''))
+        except ValueError:
+            return 0.0
+    return 0.0
+
+
+def _make_holding(symbol, cell_texts):
+    """cell_texts: the text of each gridcell in the position's center row."""
+    gain_dol_raw = pct_raw = val_raw = cost_raw = ""
+    if len(cell_texts) > VALUE_CELL:
+        gain_dol_raw = cell_texts[GAIN_DOLLAR_CELL]
+        pct_raw = cell_texts[GAIN_PCT_CELL]
+        val_raw = cell_texts[VALUE_CELL]
+        if len(cell_texts) > COST_BASIS_CELL:
+            cost_raw = cell_texts[COST_BASIS_CELL]
+
+    val = clean_number(val_raw)
+    gain_dol = clean_number(gain_dol_raw)
+
+    # Debug prints for verification
+    if gain_dol == 0.0 and val > 0:
+        print(f"DEBUG: {symbol} Gain$ 0. Raw: '{gain_dol_raw}', CostRaw: '{cost_raw}', PctRaw: '{pct_raw}'")
+
+    return {
+        "symbol": symbol,
+        "value": val,
+        "pct_gain": clean_number(pct_raw),
+        "gain_dollar": gain_dol,
+        "cost_basis_raw": clean_number(cost_raw)
+    }
+
+
+def parse_positions_bs4(content: str, features: str = 'html.parser') -> list:
+    """Pure-Python parser. Returns [(account_name, raw_holdings), ...] in page order."""
+    soup = BeautifulSoup(content, features)
+
+    pinned_container = soup.find('div', {'class': 'ag-pinned-left-cols-container'})
+    center_container = soup.find('div', {'class': 'ag-center-cols-container'})
+    if not pinned_container or not center_container:
+        print("Could not find grid containers.")
+        return []
+
+    center_map = {row.get('row-id'): row for row in center_container.find_all('div', {'role': 'row'})}
+
+    accounts = []
+    for p_row in pinned_container.find_all('div', {'role': 'row'}):
+        classes = p_row.get('class', [])
+
+        if 'posweb-row-account' in classes:
+            account_name_el = p_row.select_one('.posweb-cell-account_primary')
+            name = (account_name_el or p_row).get_text(strip=True)
+            accounts.append((name, []))
+            continue
+
+        if 'posweb-row-position' in classes and accounts:
+            sym_el = p_row.select_one('.posweb-cell-symbol-name_container span')
+            if not sym_el: continue
+            c_row = center_map.get(p_row.get('row-id'))
+            if not c_row: continue
+
+            cells = [c.get_text(" ", strip=True) for c in c_row.find_all('div', {'role': 'gridcell'})]
+            accounts[-1][1].append(_make_holding(sym_el.get_text(strip=True), cells))
+
+    return [(name, holdings) for name, holdings in accounts if holdings]
+
+
+def _class_xpath(cls: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+
+
+def _lxml_text(el, sep: str = "") -> str:
+    return sep.join(t.strip() for t in el.itertext() if t.strip())
+
+
+def parse_positions_lxml(content: str) -> list:
+    """libxml2-backed parser with the same output as parse_positions_bs4."""
+    tree = lxml_html.fromstring(content)
+
+    pinned_container = tree.xpath(f"//div[{_class_xpath('ag-pinned-left-cols-container')}]")
+    center_container = tree.xpath(f"//div[{_class_xpath('ag-center-cols-container')}]")
+    if not pinned_container or not center_container:
+        print("Could not find grid containers.")
+        return []
+
+    center_map = {row.get('row-id'): row for row in center_container[0].iterfind(".//div[@role='row']")}
+    account_name_xpath = f".//*[{_class_xpath('posweb-cell-account_primary')}]"
+    symbol_xpath = f".//*[{_class_xpath('posweb-cell-symbol-name_container')}]//span"
+
+    accounts = []
+    for p_row in pinned_container[0].iterfind(".//div[@role='row']"):
+        classes = (p_row.get('class') or "").split()
+
+        if 'posweb-row-account' in classes:
+            account_name_el = p_row.xpath(account_name_xpath)
+            name = _lxml_text(account_name_el[0] if account_name_el else p_row)
+            accounts.append((name, []))
+            continue
+
+        if 'posweb-row-position' in classes and accounts:
+            sym_el = p_row.xpath(symbol_xpath)
+            if not sym_el: continue
+            c_row = center_map.get(p_row.get('row-id'))
+            if c_row is None: continue
+
+            cells = [_lxml_text(c, " ") for c in c_row.iterfind(".//div[@role='gridcell']")]
+            accounts[-1][1].append(_make_holding(_lxml_text(sym_el[0]), cells))
+
+    return [(name, holdings) for name, holdings in accounts if holdings]
+
+
+PARSER_BACKENDS = {"html.parser": parse_positions_bs4}
+if lxml_html is not None:
+    PARSER_BACKENDS["lxml"] = parse_positions_lxml
+
+
+def get_positions_parser(backend: str = None):
+    """Returns the named backend, or the fastest one installed when backend is None."""
+    if backend is None:
+        backend = "lxml" if "lxml" in PARSER_BACKENDS else "html.parser"
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown or unavailable positions parser backend: {backend}")
+    return PARSER_BACKENDS[backend]
@@ -0,0 +1,148 @@
+# frame.py - Server-side rendering of the dashboard into a raw e-ink frame
+import io
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image, ImageOps
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+
+FRAME_WIDTH = 1872
+FRAME_HEIGHT = 1404
+FRAME_MAX_AGE_SECONDS = 600  # Re-render at least this often so calendar/news stay fresh
+PAGE_LOAD_TIMEOUT_MS = 45000
+READY_TIMEOUT_MS = 30000
+
+# Dirty-region detection: the frame is compared in square tiles, adjacent dirty tiles are
+# merged into rectangles, and past MAX_DIRTY_RECTS we fall back to a single bounding box.
+DIRTY_TILE_SIZE = 36
+MAX_DIRTY_RECTS = 32
+FRAME_HISTORY_SIZE = 4  # Recent frames kept by hash so clients can diff against what they show
+
+# Only one render at a time; concurrent requests wait and then hit the cache.
+_frame_lock = threading.Lock()
+_frame_cache = {}  # url -> {"data": bytes, "hash": str, "rendered_at": float, "generation": int}
+_frame_generation = 0
+_frame_history = OrderedDict()  # hash -> bytes
+
+
+def _screenshot_dashboard(url: str, width: int, height: int) -> bytes:
+    """Loads the dashboard in a headless browser and returns a PNG screenshot."""
+    with sync_playwright() as p:
+        browser = p.firefox.launch(headless=True, args=["--disable-webgl", "--disable-software-rasterizer"])
+        try:
+            page = browser.new_page(viewport={"width": width, "height": height})
+            page.goto(url, wait_until="load", timeout=PAGE_LOAD_TIMEOUT_MS)
+            # dashboard.html sets this flag once every panel has finished its first fetch
+            try:
+                page.wait_for_function("window.dashboardReady === true", timeout=READY_TIMEOUT_MS)
+            except PlaywrightTimeoutError:
+                print("[frame] Dashboard did not report ready in time; capturing anyway.")
+            return page.screenshot(full_page=False)
+        finally:
+            browser.close()
+
+
+def _png_to_raw(png: bytes, width: int, height: int) -> bytes:
+    """Converts a PNG screenshot into the 8-bit grayscale, vertically flipped buffer the panel expects."""
+    image = Image.open(io.BytesIO(png)).convert("L")
+    if image.size != (width, height):
+        image = image.resize((width, height), Image.LANCZOS)
+    image = ImageOps.flip(image)
+    return image.tobytes()
+
+
+def render_frame(url: str, width: int = FRAME_WIDTH, height: int = FRAME_HEIGHT) -> bytes:
+    start = time.time()
+    png = _screenshot_dashboard(url, width, height)
+    data = _png_to_raw(png, width, height)
+    print(f"[frame] Rendered {url} in {time.time() - start:.1f}s ({len(data)} bytes)")
+    return data
+
+
+def frame_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def get_frame(url: str) -> dict:
+    """Returns the cached frame entry for url ({"data", "hash"}), rendering it first if missing,
+    invalidated or too old."""
+    with _frame_lock:
+        cached = _frame_cache.get(url)
+        if (cached and cached["generation"] == _frame_generation
+                and time.time() - cached["rendered_at"] < FRAME_MAX_AGE_SECONDS):
+            return cached
+
+        generation = _frame_generation
+        data = render_frame(url)
+        entry = {"data": data, "hash": frame_hash(data), "rendered_at": time.time(), "generation": generation}
+        _frame_cache[url] = entry
+
+        _frame_history[entry["hash"]] = data
+        _frame_history.move_to_end(entry["hash"])
+        while len(_frame_history) > FRAME_HISTORY_SIZE:
+            _frame_history.popitem(last=False)
+        return entry
+
+
+def compute_dirty_rects(prev: bytes, curr: bytes, width: int = FRAME_WIDTH, height: int = FRAME_HEIGHT,
+                        tile: int = DIRTY_TILE_SIZE) -> list:
+    """Returns [x, y, w, h] rectangles (in raw buffer coordinates) covering every changed pixel."""
+    a = np.frombuffer(prev, dtype=np.uint8).reshape(height, width)
+    b = np.frombuffer(curr, dtype=np.uint8).reshape(height, width)
+    diff = a != b
+    if not diff.any():
+        return []
+
+    tiles_y = -(-height // tile)
+    tiles_x = -(-width // tile)
+    padded = np.zeros((tiles_y * tile, tiles_x * tile), dtype=bool)
+    padded[:height, :width] = diff
+    dirty = padded.reshape(tiles_y, tile, tiles_x, tile).any(axis=(1, 3))
+
+    # Horizontal runs of dirty tiles per tile row, then stack identical runs vertically
+    edges = np.diff(np.pad(dirty.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+    open_rects = {}  # (x0, x1) -> [x0, y0, x1, y1] in tiles
+    rects = []
+    for ty in range(tiles_y):
+        starts = np.flatnonzero(edges[ty] == 1)
+        ends = np.flatnonzero(edges[ty] == -1)
+        row_runs = set(zip(starts.tolist(), ends.tolist()))
+        for run in list(open_rects):
+            if run in row_runs:
+                open_rects[run][3] = ty + 1
+            else:
+                rects.append(open_rects.pop(run))
+        for run in row_runs:
+            if run not in open_rects:
+                open_rects[run] = [run[0], ty, run[1], ty + 1]
+    rects.extend(open_rects.values())
+
+    if len(rects) > MAX_DIRTY_RECTS:
+        rects = [[min(r[0] for r in rects), min(r[1] for r in rects),
+                  max(r[2] for r in rects), max(r[3] for r in rects)]]
+
+    result = []
+    for x0, y0, x1, y1 in sorted(rects, key=lambda r: (r[1], r[0])):
+        px0, py0 = x0 * tile, y0 * tile
+        px1, py1 = min(x1 * tile, width), min(y1 * tile, height)
+        result.append([px0, py0, px1 - px0, py1 - py0])
+    return result
+
+
+def get_frame_diff(entry: dict, since_hash: str):
+    """Dirty rectangles between a previously served frame and entry, or None if since_hash is unknown."""
+    if since_hash == entry["hash"]:
+        return []
+    prev = _frame_history.get(since_hash)
+    if prev is None:
+        return None
+    return compute_dirty_rects(prev, entry["data"])
+
+
+def invalidate_frame():
+    """Marks cached frames stale so the next request re-renders with the latest state."""
+    global _frame_generation
+    _frame_generation += 1
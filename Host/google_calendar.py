@@ -1,16 +1,18 @@
 # google_calendar.py
 from __future__ import print_function
 import datetime
+import functools
+import heapq
+import json
+import os
 import os.path
-import time
+import re
 import threading
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict
 import pytz
-import pickle
-
-from googleapiclient.discovery import build
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
 
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 LOCAL_TZ = pytz.timezone("America/Chicago")
@@ -18,79 +20,35 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 TOKEN_PATH = os.path.join(script_dir, 'calendar_token.pickle')
 CREDENTIALS_PATH = os.path.join(script_dir, 'google_credentials.json')
 
-# GLOBAL LOCK & COOLDOWN
-# Prevents multiple threads (e.g. api/calendar + api/upcoming) from trying
-# to open port 8081 simultaneously, which causes Errno 98.
-_auth_lock = threading.Lock()
-_last_auth_attempt_time = 0
-AUTH_COOLDOWN_SECONDS = 300  # Don't try to auth more than once every 5 minutes
+EVENT_STORE_PATH = os.path.join(script_dir, 'calendar_events.json')
 
+# The local mirror keeps events from DEFAULT_PAST_DAYS back onwards (or further back if a view asks
+# for older days); both views slice it
+DEFAULT_PAST_DAYS = 2
+EVENT_STORE_MAX_AGE_SECONDS = 60
+EVENTS_PAGE_SIZE = 250
+EVENT_FIELDS = 'nextPageToken,nextSyncToken,items(id,iCalUID,status,summary,start)'
 
-def _get_calendar_service():
-    """Helper function to authenticate and return a Google Calendar service object."""
-    global _last_auth_attempt_time
-
-    creds = None
-    if os.path.exists(TOKEN_PATH):
-        try:
-            with open(TOKEN_PATH, 'rb') as token:
-                creds = pickle.load(token)
-        except Exception as e:
-            print(f"[Calendar] Error loading pickle: {e}")
-            creds = None
-
-    if creds and creds.valid:
-        if not any(s in creds.scopes for s in SCOPES):
-            print("[Calendar] Scopes changed. Forcing re-authentication.")
-            creds = None
-
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            try:
-                creds.refresh(Request())
-            except Exception as e:
-                print(f"[Calendar] Token refresh failed: {e}")
-                creds = None
-
-        if not creds or not creds.valid:
-            # --- AUTHENTICATION FLOW START ---
-
-            # 1. Check Cooldown
-            if time.time() - _last_auth_attempt_time < AUTH_COOLDOWN_SECONDS:
-                print("[Calendar] Auth required but cooldown active. Skipping to prevent log spam.")
-                return None
-
-            # 2. Acquire Lock (Non-blocking)
-            if _auth_lock.acquire(blocking=False):
-                try:
-                    _last_auth_attempt_time = time.time()
-
-                    if not os.path.exists(CREDENTIALS_PATH):
-                        print("[Calendar] ERROR: google_credentials.json not found.")
-                        return None
+# config.json "calendars": [{"id": "...", "name": "Family"}, ...]; name is shown as the event's source
+DEFAULT_CALENDARS = [{"id": "primary"}]
+MAX_PARALLEL_CALENDARS = 4
 
-                    flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_PATH, SCOPES)
-                    print("[Calendar] Initiating login sequence (Port 8081)...")
 
-                    try:
-                        creds = flow.run_local_server(port=8081, open_browser=False)
-                        with open(TOKEN_PATH, 'wb') as token:
-                            pickle.dump(creds, token)
-                    except Exception as e:
-                        print(f"[Calendar] Auth Server Error (Port 8081 busy?): {e}")
-                        return None
+@functools.lru_cache(maxsize=None)
+def _calendar_services():
+    """Credentials and built service objects shared across requests (see google_services). Imported
+    here so the DASHBOARD_FAKE_GOOGLE path runs without googleapiclient installed."""
+    from google_services import GoogleServiceCache
+    return GoogleServiceCache('calendar', 'v3', SCOPES, TOKEN_PATH, [CREDENTIALS_PATH], tag="Calendar")
 
-                except Exception as e:
-                    print(f"[Calendar] Authentication failed: {e}")
-                    return None
-                finally:
-                    _auth_lock.release()
-            else:
-                print("[Calendar] Auth already in progress in another thread.")
-                return None
-            # --- AUTHENTICATION FLOW END ---
 
-    return build('calendar', 'v3', credentials=creds)
+def _calendar_service():
+    """Context manager that checks out a Google Calendar service object (None if not authenticated).
+    Set DASHBOARD_FAKE_GOOGLE=1 to use the in-memory fake from fake_google instead."""
+    if os.environ.get('DASHBOARD_FAKE_GOOGLE'):
+        import fake_google
+        return nullcontext(fake_google.calendar_service())
+    return _calendar_services().service()
 
 
 def _format_event_list(events: List[Dict]) -> List[Dict]:
@@ -113,62 +71,243 @@ def _format_event_list(events: List[Dict]) -> List[Dict]:
     return event_list
 
 
-def get_events_surrounding_days(num_days=2) -> List[Dict]:
-    service = _get_calendar_service()
-    if not service: return []
+class CalendarEventStore:
+    """A local mirror of one calendar, kept current with sync tokens and indexed by local start date.
+
+    A full sync stores the returned nextSyncToken; later syncs fetch only what changed, and a 410
+    Gone (expired token) falls back to a full resync. The mirror is persisted to path, and a sync
+    younger than max_age_seconds is reused. Events are tagged with source (the calendar's name).
+    """
+
+    def __init__(self, calendar_id: str = 'primary', path: str = EVENT_STORE_PATH,
+                 max_age_seconds: float = EVENT_STORE_MAX_AGE_SECONDS, source: str = ""):
+        self.calendar_id = calendar_id
+        self.path = path
+        self.source = source
+        self.max_age_seconds = max_age_seconds
+        self._events = {}  # event id -> {'id', 'iCalUID', 'summary', 'start'}
+        self._sync_token = None
+        self._time_min = None  # First local date the mirror is complete from
+        self._past_days = DEFAULT_PAST_DAYS  # How far back before today the mirror is kept
+        self._by_date = {}  # 'YYYY-MM-DD' -> [((date, time), uid, formatted event), ...] in start order
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+        self._load()
+
+    def events_between(self, first: datetime.date, last: datetime.date) -> list:
+        """((date, time), iCalUID, formatted event) for events starting on local dates first..last
+        (inclusive), in start order. Raises if the mirror doesn't cover first and can't be synced."""
+        with self._lock:
+            today = datetime.datetime.now(LOCAL_TZ).date()
+            self._past_days = max(self._past_days, (today - first).days)
+            if self._time_min is None or first < self._time_min:
+                if not self._sync(full_from=first):
+                    raise RuntimeError(f"{self.calendar_id} has never synced from {first}")
+            elif time.time() - self._synced_at > self.max_age_seconds:
+                self._sync()  # On failure, keep serving the previous mirror; the next call retries
+            by_date = self._by_date
+
+        entries = []
+        day = first
+        while day <= last:
+            entries.extend(by_date.get(day.isoformat(), ()))
+            day += datetime.timedelta(days=1)
+        return entries
+
+    def _sync(self, full_from: datetime.date = None) -> bool:
+        with _calendar_service() as service:
+            return bool(service) and self._sync_with(service, full_from)
+
+    def _sync_with(self, service, full_from: datetime.date = None) -> bool:
+        try:
+            if full_from is None and self._sync_token:
+                try:
+                    changed = self._incremental_sync(service)
+                except Exception as e:
+                    if _http_status(e) != 410:
+                        raise
+                    print("[Calendar] Sync token expired; running a full resync.")
+                    changed = self._full_sync(service, self._time_min)
+            else:
+                today = datetime.datetime.now(LOCAL_TZ).date()
+                time_min = min(full_from or today, today - datetime.timedelta(days=self._past_days))
+                changed = self._full_sync(service, time_min)
+        except Exception as e:
+            print(f"[Calendar] Sync failed: {e}")
+            return False
 
-    today = datetime.datetime.now(LOCAL_TZ).replace(hour=0, minute=0, second=0, microsecond=0)
-    start = today - datetime.timedelta(days=num_days)
-    end = today + datetime.timedelta(days=num_days + 1)
+        self._synced_at = time.time()
+        if changed:
+            self._prune_and_index()
+            self._save()
+        return True
 
-    timeMin = start.isoformat()
-    timeMax = end.isoformat()
+    def _full_sync(self, service, time_min: datetime.date) -> bool:
+        items, sync_token = _list_events(service, self.calendar_id, timeMin=_local_midnight(time_min).isoformat())
+        self._events = {item['id']: item for item in items if item.get('status') != 'cancelled'}
+        self._sync_token = sync_token
+        self._time_min = time_min
+        print(f"[Calendar] Full sync of {self.calendar_id}: {len(self._events)} events.")
+        return True
 
-    try:
-        events_result = service.events().list(
-            calendarId='primary', timeMin=timeMin, timeMax=timeMax,
-            singleEvents=True, orderBy='startTime'
-        ).execute()
-        events = events_result.get('items', [])
-        return _format_event_list(events)
-    except Exception as e:
-        print(f"[Calendar] Fetch failed: {e}")
-        return []
+    def _incremental_sync(self, service) -> bool:
+        items, sync_token = _list_events(service, self.calendar_id, syncToken=self._sync_token)
+        for item in items:
+            if item.get('status') == 'cancelled':
+                self._events.pop(item['id'], None)
+            else:
+                self._events[item['id']] = item
+        changed = bool(items) or sync_token != self._sync_token
+        self._sync_token = sync_token
+        return changed
+
+    def _prune_and_index(self):
+        """Drops events that fell out of the past window and rebuilds the per-date index."""
+        today = datetime.datetime.now(LOCAL_TZ).date()
+        first_kept = today - datetime.timedelta(days=self._past_days)
+        cutoff = first_kept.isoformat()
+        by_date = {}
+        for event_id, event in list(self._events.items()):
+            formatted = _format_event_list([event])[0]
+            if formatted['date'] < cutoff:
+                del self._events[event_id]
+                continue
+            formatted['source'] = self.source
+            entry = ((formatted['date'], formatted['time']), event.get('iCalUID', event_id), formatted)
+            by_date.setdefault(formatted['date'], []).append(entry)
+        for entries in by_date.values():
+            entries.sort(key=lambda entry: entry[0])
+        self._by_date = by_date
+        self._time_min = max(self._time_min, first_kept)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+            if saved.get('calendar_id') != self.calendar_id:
+                return
+            self._events = {event['id']: event for event in saved['events']}
+            self._sync_token = saved['sync_token']
+            self._time_min = datetime.date.fromisoformat(saved['time_min'])
+            self._past_days = saved.get('past_days', DEFAULT_PAST_DAYS)
+            self._prune_and_index()
+        except Exception as e:
+            print(f"[Calendar] Failed to load {self.path}; will resync: {e}")
+            self._events, self._sync_token, self._time_min = {}, None, None
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    'calendar_id': self.calendar_id,
+                    'sync_token': self._sync_token,
+                    'time_min': self._time_min.isoformat(),
+                    'past_days': self._past_days,
+                    'events': list(self._events.values()),
+                }, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[Calendar] Failed to save {self.path}: {e}")
 
 
-def get_upcoming_events(start_day_offset=3, num_days=30) -> List[Dict]:
-    service = _get_calendar_service()
-    if not service: return []
+def _http_status(error: Exception):
+    """HTTP status of a googleapiclient HttpError (or the fake service's equivalent), else None."""
+    resp = getattr(error, 'resp', None)
+    return getattr(resp, 'status', None)
 
-    today_start_of_day = datetime.datetime.now(LOCAL_TZ).replace(hour=0, minute=0, second=0, microsecond=0)
 
-    start_date = today_start_of_day + datetime.timedelta(days=start_day_offset)
-    end_date = start_date + datetime.timedelta(days=num_days)
+def _local_midnight(day: datetime.date) -> datetime.datetime:
+    return LOCAL_TZ.localize(datetime.datetime.combine(day, datetime.time()))
 
-    timeMin = start_date.isoformat()
-    timeMax = end_date.isoformat()
 
-    try:
+def _list_events(service, calendar_id: str, **params):
+    """Every page of an events().list query, asking only for the fields we use.
+
+    Returns (items, nextSyncToken). Sync queries can't be combined with orderBy or timeMax, so
+    items come back unordered; the store sorts them when indexing.
+    """
+    items = []
+    page_token = None
+    while True:
         events_result = service.events().list(
-            calendarId='primary',
-            timeMin=timeMin,
-            timeMax=timeMax,
-            singleEvents=True,
-            orderBy='startTime'
+            calendarId=calendar_id, singleEvents=True, maxResults=EVENTS_PAGE_SIZE,
+            fields=EVENT_FIELDS, pageToken=page_token, **params
         ).execute()
-        events = events_result.get('items', [])
-        return _format_event_list(events)
-    except Exception as e:
-        print(f"[Calendar] Upcoming fetch failed: {e}")
-        return []
+        items.extend(events_result.get('items', []))
+        page_token = events_result.get('nextPageToken')
+        if not page_token:
+            return items, events_result.get('nextSyncToken')
+
+
+_event_stores = {}  # calendar id -> CalendarEventStore
+_event_stores_lock = threading.Lock()
+_calendar_pool = ThreadPoolExecutor(max_workers=MAX_PARALLEL_CALENDARS, thread_name_prefix="calendar")
+
+
+def _event_store(calendar: Dict) -> CalendarEventStore:
+    calendar_id = calendar['id']
+    with _event_stores_lock:
+        store = _event_stores.get(calendar_id)
+        if store is None:
+            if calendar_id == 'primary':
+                path = EVENT_STORE_PATH
+            else:
+                path = os.path.join(script_dir, f"calendar_events_{re.sub(r'[^A-Za-z0-9]+', '_', calendar_id)}.json")
+            store = CalendarEventStore(calendar_id, path, source=calendar.get('name', ''))
+            _event_stores[calendar_id] = store
+        return store
+
+
+def _merged_events(first: datetime.date, last: datetime.date, calendars: List[Dict] = None) -> List[Dict]:
+    """Syncs every calendar concurrently, then k-way merges their already sorted slices into one
+    time-ordered list. An occurrence on several calendars (same iCalUID and start) is kept once,
+    from the calendar listed first. Raises if no calendar could be read, so callers keep stale data."""
+    calendars = calendars or DEFAULT_CALENDARS
+    futures = [(calendar, _calendar_pool.submit(_event_store(calendar).events_between, first, last))
+               for calendar in calendars]
+
+    per_calendar = []
+    for calendar, future in futures:
+        try:
+            per_calendar.append(future.result())
+        except Exception as e:
+            print(f"[Calendar] {calendar['id']} failed: {e}")
+    if not per_calendar:
+        raise RuntimeError("No calendar could be read")
+
+    # Instances of a recurring event share one iCalUID, so an occurrence is identified by its start too
+    merged = []
+    seen = set()
+    for start, uid, event in heapq.merge(*per_calendar, key=lambda entry: entry[0]):
+        if (uid, start) not in seen:
+            seen.add((uid, start))
+            merged.append(event)
+    return merged
+
+
+def get_events_surrounding_days(num_days=2, calendars: List[Dict] = None) -> List[Dict]:
+    today = datetime.datetime.now(LOCAL_TZ).date()
+    return _merged_events(today - datetime.timedelta(days=num_days), today + datetime.timedelta(days=num_days),
+                          calendars)
+
+
+def get_upcoming_events(start_day_offset=3, num_days=30, calendars: List[Dict] = None) -> List[Dict]:
+    start_date = datetime.datetime.now(LOCAL_TZ).date() + datetime.timedelta(days=start_day_offset)
+    return _merged_events(start_date, start_date + datetime.timedelta(days=num_days - 1), calendars)
 
 
 def create_reminder_event(title="Re-auth Robinhood"):
-    service = _get_calendar_service()
-    if not service:
-        print("[Calendar] Cannot create reminder: Service unavailable.")
-        return False
+    with _calendar_service() as service:
+        if not service:
+            print("[Calendar] Cannot create reminder: Service unavailable.")
+            return False
+        return _insert_reminder(service, title)
 
+
+def _insert_reminder(service, title: str) -> bool:
     now = datetime.datetime.now(LOCAL_TZ)
     target_start = now.replace(hour=18, minute=0, second=0, microsecond=0)
     if now > target_start:
@@ -203,8 +342,6 @@ def create_reminder_event(title="Re-auth Robinhood"):
 
 
 if __name__ == '__main__':
-    import json
-
     print("--- Surrounding Events (for week view) ---")
     print(json.dumps(get_events_surrounding_days(), indent=2))
     print("\n--- Upcoming Events (3-33 days from now) ---")
@@ -0,0 +1,154 @@
+# google_services.py - Process-wide cache of Google credentials and built API service objects
+import datetime
+import os
+import pickle
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from googleapiclient.discovery import build
+from google_auth_oauthlib.flow import InstalledAppFlow
+from google.auth.transport.requests import Request
+
+# Refresh access tokens this long before they expire so a request never races the expiry
+REFRESH_MARGIN = datetime.timedelta(minutes=5)
+AUTH_COOLDOWN_SECONDS = 300  # Don't try to auth more than once every 5 minutes
+AUTH_PORT = 8081
+
+# Every service's login flow listens on AUTH_PORT, so only one may run at a time (else Errno 98)
+_auth_lock = threading.Lock()
+
+
+class GoogleServiceCache:
+    """Hands out ready-to-use service objects for one Google API.
+
+    Credentials are loaded once and refreshed before they expire. httplib2 isn't thread-safe, so
+    service() checks a service out of a shared pool for one caller at a time. Existing tokens need
+    any of the requested scopes, or all of them with require_all_scopes.
+    """
+
+    def __init__(self, api: str, version: str, scopes: list, token_path: str, credentials_paths: list,
+                 tag: str, require_all_scopes: bool = False):
+        self.api = api
+        self.version = version
+        self.scopes = scopes
+        self.require_all_scopes = require_all_scopes
+        self.token_path = token_path
+        self.credentials_paths = credentials_paths
+        self.tag = tag
+        self._creds = None
+        self._creds_loaded = False
+        self._creds_lock = threading.Lock()
+        self._last_auth_attempt_time = 0
+        self._idle = queue.LifoQueue()  # (creds, service) not currently checked out
+
+    @contextmanager
+    def service(self):
+        """Checks out a service object for exclusive use in the with block, or yields None if no
+        credentials are available."""
+        creds = self._get_credentials()
+        if creds is None:
+            yield None
+            return
+
+        service = None
+        while service is None:
+            try:
+                built_with, pooled = self._idle.get_nowait()
+            except queue.Empty:
+                service = build(self.api, self.version, credentials=creds,
+                                static_discovery=True, cache_discovery=False)
+                break
+            if built_with is creds:
+                service = pooled
+        try:
+            yield service
+        finally:
+            self._idle.put((creds, service))
+
+    def _get_credentials(self):
+        with self._creds_lock:
+            if not self._creds_loaded:
+                self._creds = self._load_token()
+                self._creds_loaded = True
+
+            creds = self._creds
+            has_scopes = all if self.require_all_scopes else any
+            if creds and creds.scopes and not has_scopes(s in creds.scopes for s in self.scopes):
+                print(f"[{self.tag}] Scopes changed. Forcing re-authentication.")
+                creds = None
+
+            if creds and creds.refresh_token and (not creds.valid or self._expires_soon(creds)):
+                try:
+                    creds.refresh(Request())
+                    self._save_token(creds)
+                except Exception as e:
+                    print(f"[{self.tag}] Token refresh failed: {e}")
+                    creds = None
+
+            self._creds = creds
+            if creds and creds.valid:
+                return creds
+
+        # The login flow can wait minutes for the user; other callers get None meanwhile
+        creds = self._authenticate()
+        if creds:
+            with self._creds_lock:
+                self._creds = creds
+        return creds
+
+    @staticmethod
+    def _expires_soon(creds) -> bool:
+        # google-auth keeps expiry as a naive UTC datetime
+        if creds.expiry is None:
+            return False
+        now_utc = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        return creds.expiry - now_utc < REFRESH_MARGIN
+
+    def _load_token(self):
+        if not os.path.exists(self.token_path):
+            return None
+        try:
+            with open(self.token_path, 'rb') as token:
+                return pickle.load(token)
+        except Exception as e:
+            print(f"[{self.tag}] Error loading pickle: {e}")
+            return None
+
+    def _save_token(self, creds):
+        try:
+            with open(self.token_path, 'wb') as token:
+                pickle.dump(creds, token)
+        except Exception as e:
+            print(f"[{self.tag}] Failed to save token: {e}")
+
+    def _authenticate(self):
+        if time.time() - self._last_auth_attempt_time < AUTH_COOLDOWN_SECONDS:
+            print(f"[{self.tag}] Auth required but cooldown active. Skipping to prevent log spam.")
+            return None
+
+        if not _auth_lock.acquire(blocking=False):
+            print(f"[{self.tag}] Auth already in progress in another thread.")
+            return None
+        try:
+            self._last_auth_attempt_time = time.time()
+            credentials_file = next((p for p in self.credentials_paths if os.path.exists(p)), None)
+            if not credentials_file:
+                print(f"[{self.tag}] ERROR: Credentials file not found.")
+                return None
+
+            flow = InstalledAppFlow.from_client_secrets_file(credentials_file, self.scopes)
+            print(f"[{self.tag}] Initiating login sequence (Port {AUTH_PORT})...")
+            try:
+                creds = flow.run_local_server(port=AUTH_PORT, open_browser=False)
+            except Exception as e:
+                print(f"[{self.tag}] Auth Server Error (Port {AUTH_PORT} busy?): {e}")
+                return None
+            self._save_token(creds)
+            return creds
+        except Exception as e:
+            print(f"[{self.tag}] Authentication failed: {e}")
+            return None
+        finally:
+            _auth_lock.release()
@@ -1,17 +1,24 @@
 import datetime
 import os
 import json
-import pickle
 import io
-import time
-import threading
+import warnings
 from collections import defaultdict
 from typing import List, Dict, Any
 
-from googleapiclient.discovery import build
+import numpy as np
+
+import datastore
+from health_dates import local_date_of
+
 from googleapiclient.http import MediaIoBaseDownload
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+from google_services import GoogleServiceCache
 
 # --- CONFIGURATION ---
 TARGET_FOLDER_ID = "1uBEwWRgd4KHCs_YKa-isVGaLzUa3bFr1"
@@ -25,83 +32,35 @@ METRICS_TO_PROCESS = {
 
 # --- FILE PATHS ---
 _SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-HEALTH_HISTORY_FILE = os.path.join(_SCRIPT_DIR, 'health_data.json')
+# Daily history lives in the datastore's health_daily table; this file is only imported once
+LEGACY_HISTORY_FILE = os.path.join(_SCRIPT_DIR, 'health_data.json')
+HEALTH_INGEST_STATE_FILE = os.path.join(_SCRIPT_DIR, 'health_ingest.json')
 TOKEN_PATH = os.path.join(_SCRIPT_DIR, 'drive_token.pickle')
 DRIVE_CREDENTIALS_PATH = os.path.join(_SCRIPT_DIR, 'drive_credentials.json')
 CALENDAR_CREDENTIALS_PATH = os.path.join(_SCRIPT_DIR, 'google_credentials.json')
 
 # --- CONSTANTS ---
-HISTORY_DAYS_TO_KEEP = 14
+# Callers can keep more via get_weekly_health_summary(history_days=...)
+DEFAULT_HISTORY_DAYS_TO_KEEP = 365
+ROLLING_WINDOWS = (7, 30, 90)
+WEEK_OVER_WEEK_DAYS = 7
+# An export whose Drive metadata matches all of these was already merged and is not downloaded again
+INGEST_REVISION_KEYS = ('id', 'md5Checksum', 'modifiedTime')
+# With ijson installed, exports are parsed while downloading in chunks of this size
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+_POINT_FIELD_PREFIXES = {
+    'data.metrics.item.data.item.date': 'date',
+    'data.metrics.item.data.item.qty': 'qty',
+}
 
-# GLOBAL LOCK & COOLDOWN for Health Auth
-_health_auth_lock = threading.Lock()
-_last_health_auth_time = 0
-AUTH_COOLDOWN_SECONDS = 300  # 5 minutes
+# Credentials and built service objects are shared across runs (see google_services)
+_drive_services = GoogleServiceCache('drive', 'v3', SCOPES, TOKEN_PATH,
+                                     [DRIVE_CREDENTIALS_PATH, CALENDAR_CREDENTIALS_PATH], tag="Health",
+                                     require_all_scopes=True)
 
 
-def _get_drive_service():
-    """Authenticates with Google and returns a Drive API service object."""
-    global _last_health_auth_time
-    creds = None
-    if os.path.exists(TOKEN_PATH):
-        try:
-            with open(TOKEN_PATH, 'rb') as token:
-                creds = pickle.load(token)
-        except Exception as e:
-            print(f"[Health] Error loading pickle: {e}")
-            creds = None
-
-    if not creds or not creds.valid or not all(s in creds.scopes for s in SCOPES):
-        if creds and creds.expired and creds.refresh_token:
-            try:
-                creds.scopes = list(set(SCOPES + creds.scopes))
-                creds.refresh(Request())
-            except Exception as e:
-                print(f"[Health] Token refresh failed: {e}")
-                creds = None
-
-        if not creds or not creds.valid:
-            # --- AUTHENTICATION FLOW START ---
-            if time.time() - _last_health_auth_time < AUTH_COOLDOWN_SECONDS:
-                print("[Health] Auth required but cooldown active. Skipping.")
-                return None
-
-            if _health_auth_lock.acquire(blocking=False):
-                try:
-                    _last_health_auth_time = time.time()
-                    credentials_file = DRIVE_CREDENTIALS_PATH if os.path.exists(
-                        DRIVE_CREDENTIALS_PATH) else CALENDAR_CREDENTIALS_PATH
-
-                    if not os.path.exists(credentials_file):
-                        print(f"[Health] ERROR: Credentials file not found.")
-                        return None
-
-                    flow = InstalledAppFlow.from_client_secrets_file(credentials_file, SCOPES)
-                    print("[Health] Initiating login sequence (Port 8081)...")
-
-                    try:
-                        creds = flow.run_local_server(port=8081, open_browser=False)
-                        with open(TOKEN_PATH, 'wb') as token:
-                            pickle.dump(creds, token)
-                    except Exception as e:
-                        print(f"[Health] Auth Server Error (Port 8081 busy?): {e}")
-                        return None
-
-                except Exception as e:
-                    print(f"[Health] Auth failed: {e}")
-                    return None
-                finally:
-                    _health_auth_lock.release()
-            else:
-                print("[Health] Auth already in progress in another thread.")
-                return None
-            # --- AUTHENTICATION FLOW END ---
-
-    return build('drive', 'v3', credentials=creds)
-
-
-def _find_and_download_latest_file(service: Any) -> str:
-    """Finds the most recent health export file and returns its content as a string."""
+def _find_latest_file(service: Any) -> Dict[str, str]:
+    """Metadata (id, name, md5Checksum, modifiedTime) of the most recent health export, or None."""
     if not TARGET_FOLDER_ID or "YOUR_FOLDER_ID" in TARGET_FOLDER_ID:
         raise ValueError("TARGET_FOLDER_ID is not set.")
 
@@ -109,16 +68,21 @@ def _find_and_download_latest_file(service: Any) -> str:
     try:
         response = service.files().list(
             q=query, corpora="user", includeItemsFromAllDrives=True,
-            supportsAllDrives=True, spaces='drive', fields='files(id, name)',
+            supportsAllDrives=True, spaces='drive', fields='files(id, name, md5Checksum, modifiedTime)',
             orderBy='name desc', pageSize=1
         ).execute()
 
         files = response.get('files', [])
-        if not files:
-            # Silent fail is better than crash for dashboard
-            return None
+        # Silent fail is better than crash for dashboard
+        return files[0] if files else None
+    except Exception as e:
+        print(f"[Health] File lookup failed: {e}")
+        return None
+
 
-        file_id = files[0]['id']
+def _download_file(service: Any, file_id: str) -> str:
+    """Returns the content of a Drive file as a string."""
+    try:
         request = service.files().get_media(fileId=file_id)
         fh = io.BytesIO()
         downloader = MediaIoBaseDownload(fh, request)
@@ -133,7 +97,82 @@ def _find_and_download_latest_file(service: Any) -> str:
         return None
 
 
-def _parse_health_data(json_content: str) -> Dict[str, Dict[str, float]]:
+def _load_ingest_state() -> Dict[str, str]:
+    """What was last merged: the export's Drive id/md5Checksum/modifiedTime and its newest day."""
+    if os.path.exists(HEALTH_INGEST_STATE_FILE):
+        try:
+            with open(HEALTH_INGEST_STATE_FILE, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            pass
+    return {}
+
+
+def _save_ingest_state(file_meta: Dict[str, str], last_merged_date: str):
+    ingest_state = {key: file_meta.get(key) for key in INGEST_REVISION_KEYS}
+    ingest_state['last_merged_date'] = last_merged_date
+    with open(HEALTH_INGEST_STATE_FILE, 'w') as f:
+        json.dump(ingest_state, f, indent=2)
+
+
+def _is_same_revision(file_meta: Dict[str, str], ingest_state: Dict[str, str]) -> bool:
+    return all(file_meta.get(key) == ingest_state.get(key) for key in INGEST_REVISION_KEYS)
+
+
+def _import_legacy_history(store: datastore.DataStore):
+    """Moves health_data.json into an empty health_daily table."""
+    if not os.path.exists(LEGACY_HISTORY_FILE) or store.query("SELECT 1 FROM health_daily LIMIT 1"):
+        return
+    try:
+        with open(LEGACY_HISTORY_FILE, 'r') as f:
+            legacy = json.load(f)
+        store.put_health_days({item['date']: item['metrics'] for item in legacy}).result()
+        print(f"[Health] Imported {len(legacy)} days from {os.path.basename(LEGACY_HISTORY_FILE)}.")
+    except (OSError, json.JSONDecodeError, KeyError, TypeError) as e:
+        print(f"[Health] Could not import {LEGACY_HISTORY_FILE}: {e}")
+
+
+def _load_history() -> List[Dict[str, Any]]:
+    """The days the summary looks at (the last max(ROLLING_WINDOWS) days), newest first."""
+    store = datastore.get_store()
+    _import_legacy_history(store)
+    first_day = datetime.date.today() - datetime.timedelta(days=max(ROLLING_WINDOWS + (WEEK_OVER_WEEK_DAYS,)) - 1)
+    return store.health_history(since=first_day.isoformat())
+
+
+class _DailyMetricTotals:
+    """Aggregates tracked metric points into per-day values (days in health_dates.LOCAL_TZ) as they
+    arrive: a running sum for most metrics, the latest reading for resting heart rate. Points on
+    local days before since ('YYYY-MM-DD') are skipped."""
+
+    def __init__(self, since: str = None):
+        self.since = since
+        self._days = defaultdict(dict)  # iso date -> {metric name: running value}
+
+    def add(self, metric_name: str, point: Dict[str, Any]):
+        try:
+            iso_date = local_date_of(point['date'])
+            if self.since and iso_date < self.since:
+                return
+            qty = float(point['qty'])
+        except (KeyError, IndexError, ValueError, TypeError):
+            return
+
+        day = self._days[iso_date]
+        if metric_name == 'resting_heart_rate':
+            day[metric_name] = qty
+        else:
+            day[metric_name] = day.get(metric_name, 0.0) + qty
+
+    def result(self) -> Dict[str, Dict[str, float]]:
+        return {
+            date: {name: value if name == 'resting_heart_rate' else round(value, 2) for name, value in metrics.items()}
+            for date, metrics in self._days.items()
+        }
+
+
+def _parse_health_data(json_content: str, since: str = None) -> Dict[str, Dict[str, float]]:
+    """Daily totals per metric from a fully downloaded export (used when ijson is unavailable)."""
     if not json_content: return {}
     try:
         data = json.loads(json_content)
@@ -141,133 +180,197 @@ def _parse_health_data(json_content: str) -> Dict[str, Dict[str, float]]:
     except (json.JSONDecodeError, AttributeError):
         return {}
 
-    points_by_day = defaultdict(lambda: defaultdict(list))
-
+    totals = _DailyMetricTotals(since)
     for metric_obj in metrics_list:
         metric_name = metric_obj.get('name')
         if metric_name not in METRICS_TO_PROCESS:
             continue
-
         for point in metric_obj.get('data', []):
-            try:
-                iso_date = datetime.datetime.strptime(
-                    point['date'], '%Y-%m-%d %H:%M:%S %z'
-                ).date().isoformat()
-                qty = float(point['qty'])
-                points_by_day[iso_date][metric_name].append(qty)
-            except (KeyError, IndexError, ValueError, TypeError):
-                continue
-
-    final_daily_metrics = {}
-    for date, metrics in points_by_day.items():
-        day_totals = {}
-        for metric_name, values in metrics.items():
-            if not values:
-                continue
-            if metric_name == 'resting_heart_rate':
-                day_totals[metric_name] = values[-1]
-            else:
-                day_totals[metric_name] = round(sum(values), 2)
-        if day_totals:
-            final_daily_metrics[date] = day_totals
-
-    return final_daily_metrics
+            totals.add(metric_name, point)
+    return totals.result()
+
+
+def _metric_point_events(totals: _DailyMetricTotals):
+    """ijson event sink: rebuilds one data point at a time and hands points of tracked metrics to
+    totals. Untracked metrics are dropped point by point; only points that precede their metric's
+    "name" key are held until the name is known."""
+    metric_name = None
+    pending = []
+    point = None
+    while True:
+        prefix, event, value = (yield)
+        if prefix == 'data.metrics.item':
+            if event == 'start_map':
+                metric_name, pending = None, []
+        elif prefix == 'data.metrics.item.name':
+            metric_name = value
+            if metric_name in METRICS_TO_PROCESS:
+                for held in pending:
+                    totals.add(metric_name, held)
+            pending = []
+        elif prefix == 'data.metrics.item.data.item':
+            if event == 'start_map':
+                point = {}
+            elif event == 'end_map':
+                if metric_name is None:
+                    pending.append(point)
+                elif metric_name in METRICS_TO_PROCESS:
+                    totals.add(metric_name, point)
+                point = None
+        elif point is not None and prefix in _POINT_FIELD_PREFIXES:
+            point[_POINT_FIELD_PREFIXES[prefix]] = value
+
+
+class _ParserWriter:
+    """File-like target for MediaIoBaseDownload that pushes each chunk straight into the parser."""
+
+    def __init__(self, parser):
+        self._parser = parser
+
+    def write(self, data: bytes) -> int:
+        self._parser.send(data)
+        return len(data)
+
+
+def _stream_parse_file(service: Any, file_id: str, since: str = None) -> Dict[str, Dict[str, float]]:
+    """Downloads an export in DOWNLOAD_CHUNK_SIZE pieces and aggregates it while it arrives, so
+    memory is bounded by the tracked daily totals rather than the size of the export."""
+    totals = _DailyMetricTotals(since)
+    events = _metric_point_events(totals)
+    next(events)
+    parser = ijson.parse_coro(events, use_float=True)
+    try:
+        request = service.files().get_media(fileId=file_id)
+        downloader = MediaIoBaseDownload(_ParserWriter(parser), request, chunksize=DOWNLOAD_CHUNK_SIZE)
 
+        done = False
+        while not done:
+            _, done = downloader.next_chunk()
+        parser.close()
+    except Exception as e:
+        print(f"[Health] Streaming download failed: {e}")
+        return {}
+    return totals.result()
 
-def _update_and_save_history(new_data: Dict[str, Dict[str, float]]) -> List[Dict[str, Any]]:
-    history = []
-    if os.path.exists(HEALTH_HISTORY_FILE):
-        try:
-            with open(HEALTH_HISTORY_FILE, 'r') as f:
-                history = json.load(f)
-        except json.JSONDecodeError:
-            history = []
 
-    history_dict = {item['date']: item['metrics'] for item in history}
+def _update_and_save_history(new_data: Dict[str, Dict[str, float]],
+                             history_days: int = DEFAULT_HISTORY_DAYS_TO_KEEP) -> List[Dict[str, Any]]:
+    """Writes only the new days (replacing those days' metrics) and drops days older than history_days."""
+    keep_since = datetime.date.today() - datetime.timedelta(days=history_days - 1)
+    datastore.get_store().put_health_days(new_data, keep_since=keep_since.isoformat()).result()
+    return _load_history()
 
-    for date, metrics in new_data.items():
-        history_dict[date] = metrics
 
-    updated_history = [
-        {'date': date, 'metrics': metrics}
-        for date, metrics in history_dict.items()
-    ]
+class HealthColumns:
+    """Day-indexed columnar view of the health history: one float row per tracked metric and one
+    column per calendar day, oldest first, with the last column being today.
 
-    updated_history.sort(key=lambda x: x['date'], reverse=True)
-    updated_history = updated_history[:HISTORY_DAYS_TO_KEEP]
+    Days present in the history but missing a metric count as 0 (as the export omits zero days);
+    days absent from the history are NaN and ignored by the statistics.
+    """
 
-    with open(HEALTH_HISTORY_FILE, 'w') as f:
-        json.dump(updated_history, f, indent=2)
+    def __init__(self, history: List[Dict[str, Any]], today: datetime.date = None, num_days: int = None):
+        self.today = today or datetime.date.today()
+        self.metric_keys = list(METRICS_TO_PROCESS)
+        num_days = num_days or max(ROLLING_WINDOWS + (WEEK_OVER_WEEK_DAYS,))
 
-    return updated_history
+        self.values = np.full((len(self.metric_keys), num_days), np.nan)
+        today_ordinal = self.today.toordinal()
+        for item in history:
+            try:
+                column = num_days - 1 - (today_ordinal - datetime.date.fromisoformat(item['date']).toordinal())
+                metrics = item['metrics']
+            except (KeyError, ValueError, TypeError):
+                continue
+            if 0 <= column < num_days:
+                self.values[:, column] = [metrics.get(key, 0.0) for key in self.metric_keys]
 
+    def window(self, days: int, offset: int = 0) -> np.ndarray:
+        """Columns for the days days ending offset days before today."""
+        end = self.values.shape[1] - offset
+        return self.values[:, max(end - days, 0):end]
 
-def _calculate_weekly_summary(history: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
-    today = datetime.date.today()
-    summary = {}
+    def window_stats(self, days: int) -> Dict[str, np.ndarray]:
+        """Per-metric mean/median/min/max over the trailing window (NaN where there is no data)."""
+        window = self.window(days)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # All-NaN rows are expected and stay NaN
+            return {
+                'mean': np.nanmean(window, axis=1),
+                'median': np.nanmedian(window, axis=1),
+                'min': np.nanmin(window, axis=1),
+                'max': np.nanmax(window, axis=1),
+                'days': np.count_nonzero(~np.isnan(window), axis=1),
+            }
 
-    for metric_key, config in METRICS_TO_PROCESS.items():
-        current_week_values = []
-        last_week_values = []
 
-        for item in history:
-            try:
-                item_date = datetime.datetime.strptime(item['date'], '%Y-%m-%d').date()
-                days_ago = (today - item_date).days
-                value = item['metrics'].get(metric_key, 0.0)
-
-                if 0 <= days_ago < 7:
-                    current_week_values.append(value)
-                elif 7 <= days_ago < 14:
-                    last_week_values.append(value)
-            except (KeyError, ValueError):
-                continue
+def _json_number(value):
+    return None if np.isnan(value) else round(float(value), 2)
 
-        current_avg = sum(current_week_values) / len(current_week_values) if current_week_values else 0.0
-        last_avg = sum(last_week_values) / len(last_week_values) if last_week_values else 0.0
 
-        change_pct = 0.0
-        if last_avg > 0:
-            change_pct = ((current_avg - last_avg) / last_avg) * 100.0
-        elif current_avg > 0:
-            change_pct = 100.0
+def _calculate_weekly_summary(history: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """This week's average and week-over-week change per metric (as before), plus mean, median,
+    min and max over each of ROLLING_WINDOWS, computed for all metrics at once."""
+    columns = HealthColumns(history)
+    window_stats = {days: columns.window_stats(days) for days in ROLLING_WINDOWS}
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        current_avg = np.nan_to_num(np.nanmean(columns.window(WEEK_OVER_WEEK_DAYS), axis=1))
+        last_avg = np.nan_to_num(np.nanmean(columns.window(WEEK_OVER_WEEK_DAYS, offset=WEEK_OVER_WEEK_DAYS), axis=1))
+    change_pct = np.where(last_avg > 0, (current_avg - last_avg) / np.where(last_avg > 0, last_avg, 1) * 100.0,
+                          np.where(current_avg > 0, 100.0, 0.0))
 
+    summary = {}
+    for row, metric_key in enumerate(columns.metric_keys):
+        config = METRICS_TO_PROCESS[metric_key]
         summary[metric_key] = {
             "name": config['name'],
             "unit": config['unit'],
-            "avg": current_avg,
-            "change": change_pct
+            "avg": float(current_avg[row]),
+            "change": float(change_pct[row]),
+            "windows": {
+                str(days): {
+                    stat: int(values[row]) if stat == 'days' else _json_number(values[row])
+                    for stat, values in stats.items()
+                }
+                for days, stats in window_stats.items()
+            },
         }
     return summary
 
 
-def get_weekly_health_summary() -> Dict[str, Dict[str, Any]]:
-    service = _get_drive_service()
+def get_weekly_health_summary(history_days: int = DEFAULT_HISTORY_DAYS_TO_KEEP) -> Dict[str, Dict[str, Any]]:
+    with _drive_services.service() as service:
+        return _weekly_health_summary(service, history_days)
 
-    # If service unavailable, try to serve from history cache
+
+def _weekly_health_summary(service: Any, history_days: int) -> Dict[str, Dict[str, Any]]:
+    # If service unavailable, serve from history cache
     if not service:
-        history = []
-        if os.path.exists(HEALTH_HISTORY_FILE):
-            try:
-                with open(HEALTH_HISTORY_FILE, 'r') as f:
-                    history = json.load(f)
-            except:
-                pass
-        return _calculate_weekly_summary(history)
+        return _calculate_weekly_summary(_load_history())
 
-    json_content = _find_and_download_latest_file(service)
-    newly_parsed_data = _parse_health_data(json_content)
+    latest_file = _find_latest_file(service)
+    if not latest_file:
+        return _calculate_weekly_summary(_load_history())
+
+    ingest_state = _load_ingest_state()
+    if _is_same_revision(latest_file, ingest_state):
+        print(f"[Health] {latest_file.get('name')} unchanged since last run; skipping download.")
+        return _calculate_weekly_summary(_load_history())
+
+    # A newer revision of the same export only adds days; the last merged day may have been
+    # partial, so it is merged again. A different export file is merged in full.
+    since = ingest_state.get('last_merged_date') if latest_file['id'] == ingest_state.get('id') else None
+    if ijson is not None:
+        newly_parsed_data = _stream_parse_file(service, latest_file['id'], since=since)
+    else:
+        newly_parsed_data = _parse_health_data(_download_file(service, latest_file['id']), since=since)
 
     if not newly_parsed_data:
-        history = []
-        if os.path.exists(HEALTH_HISTORY_FILE):
-            try:
-                with open(HEALTH_HISTORY_FILE, 'r') as f:
-                    history = json.load(f)
-            except:
-                pass
-        return _calculate_weekly_summary(history)
+        return _calculate_weekly_summary(_load_history())
 
-    updated_history = _update_and_save_history(newly_parsed_data)
+    updated_history = _update_and_save_history(newly_parsed_data, history_days)
+    _save_ingest_state(latest_file, max(newly_parsed_data))
 
-    return _calculate_weekly_summary(updated_history)
\ No newline at end of file
+    return _calculate_weekly_summary(updated_history)
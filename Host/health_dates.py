@@ -0,0 +1,53 @@
+# health_dates.py - Fast local-day bucketing for Health Auto Export timestamps
+import datetime
+import re
+
+import pytz
+
+LOCAL_TZ = pytz.timezone("America/Chicago")
+EXPORT_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S %z'  # e.g. '2024-03-09 23:41:00 -0600'
+_is_export_timestamp = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2} [0-9]{2}:[0-5][0-9]:[0-5][0-9] [+-][0-9]{2}[0-5][0-9]').fullmatch
+
+# 'YYYY-MM-DD HH±HHMM' -> local ISO date, or None when the hour straddles local midnight
+MAX_CACHED_HOURS = 16384
+_hour_days = {}
+_NOT_CACHED = object()
+
+
+def _parse_slow(timestamp: str) -> str:
+    return datetime.datetime.strptime(timestamp, EXPORT_TIMESTAMP_FORMAT).astimezone(LOCAL_TZ).date().isoformat()
+
+
+def _local_date_of_hour(hour_prefix: str, offset: str):
+    """Local date of every instant in the hour 'YYYY-MM-DD HH' at UTC offset '±HHMM', or None
+    if that hour straddles local midnight (possible with half-hour offsets)."""
+    sign = -1 if offset[0] == '-' else 1
+    tz = datetime.timezone(sign * datetime.timedelta(hours=int(offset[1:3]), minutes=int(offset[3:5])))
+    start = datetime.datetime(int(hour_prefix[0:4]), int(hour_prefix[5:7]), int(hour_prefix[8:10]),
+                              int(hour_prefix[11:13]), tzinfo=tz)
+    first = start.astimezone(LOCAL_TZ).date()
+    last = (start + datetime.timedelta(minutes=59, seconds=59)).astimezone(LOCAL_TZ).date()
+    return first.isoformat() if first == last else None
+
+
+def local_date_of(timestamp: str) -> str:
+    """ISO local date (in LOCAL_TZ) of an export timestamp; same result as strptime + astimezone.
+
+    Timestamps in the fixed 'YYYY-MM-DD HH:MM:SS ±HHMM' shape are validated with one regex match
+    and resolved through a per-hour cache, since every minute of a given hour and offset lands on
+    the same local day. Anything else goes through strptime, which raises ValueError when invalid.
+    """
+    if _is_export_timestamp(timestamp):
+        key = timestamp[:13] + timestamp[20:]
+        day = _hour_days.get(key, _NOT_CACHED)
+        if day is _NOT_CACHED:
+            if len(_hour_days) >= MAX_CACHED_HOURS:
+                _hour_days.clear()
+            try:
+                day = _local_date_of_hour(timestamp[:13], timestamp[20:])
+            except ValueError:
+                day = None  # e.g. month 13; strptime below reports it
+            _hour_days[key] = day
+        if day is not None:
+            return day
+    return _parse_slow(timestamp)
@@ -0,0 +1,86 @@
+# http_client.py - Shared keep-alive HTTP session with retries, per-host pool limits and timing
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TIMEOUT = 10
+POOL_HOSTS = 8  # Hosts whose connection pools are kept alive
+POOL_CONNECTIONS_PER_HOST = 2  # The dashboard never has more than a couple of requests in flight per host
+# Idempotent requests retry connection errors and throttling/5xx answers: 0.5s, 1s, 2s apart
+RETRY = Retry(total=3, connect=3, read=2, status=3, backoff_factor=0.5,
+              status_forcelist=(429, 500, 502, 503, 504), allowed_methods=frozenset({"GET", "HEAD"}),
+              respect_retry_after_header=True, raise_on_status=False)
+
+
+class TimedSession(requests.Session):
+    """A requests.Session that keeps per-host request counts, errors and latency.
+
+    Connections are pooled per host (urllib3 keeps them alive between requests), so after the
+    first request to a host later ones skip DNS, TCP and TLS setup. pool_block makes
+    POOL_CONNECTIONS_PER_HOST a hard limit: extra concurrent requests wait for a free connection.
+    """
+
+    def __init__(self, retry: Retry = RETRY, pool_connections_per_host: int = POOL_CONNECTIONS_PER_HOST):
+        super().__init__()
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=POOL_HOSTS,
+                              pool_maxsize=pool_connections_per_host, pool_block=True)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+        self._stats = {}  # host -> {"requests", "errors", "total_seconds", "max_seconds", "last_seconds"}
+        self._stats_lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        start = time.perf_counter()
+        failed = True
+        try:
+            response = super().request(method, url, **kwargs)
+            failed = response.status_code >= 400
+            return response
+        finally:
+            self._record(urlsplit(url).netloc, time.perf_counter() - start, failed)
+
+    def _record(self, host: str, seconds: float, failed: bool):
+        with self._stats_lock:
+            stats = self._stats.setdefault(host, {"requests": 0, "errors": 0, "total_seconds": 0.0,
+                                                  "max_seconds": 0.0, "last_seconds": 0.0})
+            stats["requests"] += 1
+            stats["errors"] += failed
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["last_seconds"] = seconds
+
+    def timings(self) -> dict:
+        """Per-host {"requests", "errors", "avg_ms", "max_ms", "last_ms"} (including retries' waits)."""
+        with self._stats_lock:
+            return {
+                host: {
+                    "requests": stats["requests"],
+                    "errors": stats["errors"],
+                    "avg_ms": round(stats["total_seconds"] / stats["requests"] * 1000, 1),
+                    "max_ms": round(stats["max_seconds"] * 1000, 1),
+                    "last_ms": round(stats["last_seconds"] * 1000, 1),
+                }
+                for host, stats in self._stats.items()
+            }
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> TimedSession:
+    """The process-wide session shared by the upstream providers."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = TimedSession()
+        return _session
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return get_session().get(url, **kwargs)
@@ -0,0 +1,85 @@
+# jobs.py - Runs the data refresh jobs concurrently, isolated from each other
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobExecutor:
+    """Runs named jobs on a shared worker pool.
+
+    A job still queued or running isn't started again, and exceptions are logged per job. A job
+    that outlives its timeout is reported and its on_timeout hook called (the thread can't be killed).
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._futures = {}  # name -> Future of the queued or running instance
+        self._runs = {}  # name -> {"status", "started_at", "duration", "error"}
+
+    def submit(self, name: str, fn, timeout: float = None, on_timeout=None):
+        """Queues fn under name. Returns its Future, or None if that job is already pending."""
+        with self._lock:
+            pending = self._futures.get(name)
+            if pending and not pending.done():
+                print(f"[jobs] {name} is still running; skipping this run.")
+                return None
+            future = self._pool.submit(self._run, name, fn, timeout, on_timeout)
+            self._futures[name] = future
+            return future
+
+    def cancel(self, name: str = None):
+        """Cancels queued (not yet started) instances of name, or of every job."""
+        with self._lock:
+            futures = [f for n, f in self._futures.items() if name is None or n == name]
+        for future in futures:
+            future.cancel()
+
+    def status(self) -> dict:
+        """Last known outcome of every job that has run."""
+        with self._lock:
+            return {name: dict(run) for name, run in self._runs.items()}
+
+    def shutdown(self):
+        self.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, name, fn, timeout, on_timeout):
+        run = {"status": "running", "started_at": time.time(), "duration": None, "error": None}
+        with self._lock:
+            self._runs[name] = run
+
+        timer = None
+        if timeout:
+            timer = threading.Timer(timeout, self._timed_out, args=(name, run, timeout, on_timeout))
+            timer.daemon = True
+            timer.start()
+
+        try:
+            fn()
+            status, error = "ok", None
+        except Exception as e:
+            print(f"[jobs] {name} failed: {e!r}")
+            status, error = "error", str(e) or e.__class__.__name__
+        finally:
+            if timer:
+                timer.cancel()
+
+        with self._lock:
+            run["duration"] = time.time() - run["started_at"]
+            if run["status"] == "timeout":
+                print(f"[jobs] {name} finished after timing out ({run['duration']:.1f}s).")
+            else:
+                run["status"], run["error"] = status, error
+
+    def _timed_out(self, name, run, timeout, on_timeout):
+        with self._lock:
+            if run["status"] != "running":
+                return
+            run["status"], run["error"] = "timeout", f"exceeded {timeout:g}s"
+        print(f"[jobs] {name} exceeded its {timeout:g}s timeout.")
+        if on_timeout:
+            try:
+                on_timeout()
+            except Exception as e:
+                print(f"[jobs] {name} timeout handler failed: {e}")
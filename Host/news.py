@@ -1,10 +1,12 @@
-import requests
+import os
 import xml.etree.ElementTree as ET
 from datetime import datetime
 import time
 
+import http_client
+
 # Using BBC World News RSS as a free, reliable source for Geopolitical/Political news
-RSS_URL = "http://feeds.bbci.co.uk/news/world/rss.xml"
+RSS_URL = os.environ.get("NEWS_RSS_URL", "http://feeds.bbci.co.uk/news/world/rss.xml")
 
 
 def get_political_news(limit=5):
@@ -12,7 +14,7 @@ def get_political_news(limit=5):
     Fetches the latest news from the RSS feed and returns a list of dictionaries.
     """
     try:
-        response = requests.get(RSS_URL, timeout=10)
+        response = http_client.get(RSS_URL, timeout=10)
         response.raise_for_status()
 
         # Parse XML
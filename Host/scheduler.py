@@ -0,0 +1,55 @@
+# scheduler.py - Timer-driven scheduling of the refresh jobs on top of APScheduler
+from datetime import datetime
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+
+# A run missed by up to this long (e.g. while the host was suspended) still fires once on wake-up
+MISFIRE_GRACE_SECONDS = 60 * 60
+DEFAULT_JITTER_SECONDS = 60  # Interval jobs only; the refresh_hours runs fire on the hour
+
+
+def create_scheduler() -> BackgroundScheduler:
+    """A scheduler whose thread sleeps until the next due job instead of polling.
+
+    coalesce folds several missed runs of a job into one, and max_instances=1 keeps a job from
+    overlapping itself; the JobExecutor additionally skips a source whose previous run is still going.
+    """
+    return BackgroundScheduler(job_defaults={
+        "coalesce": True,
+        "max_instances": 1,
+        "misfire_grace_time": MISFIRE_GRACE_SECONDS,
+    })
+
+
+def schedule_jobs(scheduler: BackgroundScheduler, config: dict, run_job, periodic_update):
+    """(Re)builds the job table from config. run_job(name) hands one source to the JobExecutor;
+    periodic_update() starts all of them."""
+    jitter = config.get("scheduler_jitter_seconds", DEFAULT_JITTER_SECONDS)
+    scheduler.remove_all_jobs()
+    for hr in config.get("refresh_hours", []):
+        scheduler.add_job(run_job, CronTrigger(hour=int(hr), minute=0), args=["net_worth"],
+                          id=f"net_worth@{int(hr):02d}", name="net_worth")
+    scheduler.add_job(run_job, IntervalTrigger(hours=1, jitter=jitter), args=["weather"],
+                      id="weather", name="weather")
+    scheduler.add_job(periodic_update, IntervalTrigger(hours=6, jitter=jitter),
+                      id="periodic_update", name="periodic_update")
+
+
+def describe_jobs(scheduler: BackgroundScheduler, job_status: dict) -> list:
+    """Scheduled jobs with their next run time and the outcome of the last run of their source."""
+    described = []
+    for job in scheduler.get_jobs():
+        next_run = getattr(job, "next_run_time", None)
+        last_run = job_status.get(job.name)
+        if last_run:
+            last_run = dict(last_run, started_at=datetime.fromtimestamp(last_run["started_at"]).isoformat(timespec="seconds"))
+        described.append({
+            "id": job.id,
+            "job": job.name,
+            "trigger": str(job.trigger),
+            "next_run": next_run.isoformat(timespec="seconds") if next_run else None,
+            "last_run": last_run,
+        })
+    return sorted(described, key=lambda j: j["next_run"] or "")
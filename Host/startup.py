@@ -0,0 +1,67 @@
+# startup.py - Deferred imports for heavy provider modules and startup timing for --profile-startup
+import importlib
+import threading
+import time
+
+_process_start = time.perf_counter()
+_timings = []  # (label, "took" | "at", seconds) in the order they happened
+_timings_lock = threading.Lock()
+_first_request_reported = False
+
+
+def record(label: str, seconds: float):
+    """Records how long a step (e.g. one import) took."""
+    with _timings_lock:
+        _timings.append((label, "took", seconds))
+
+
+def mark(label: str):
+    """Records how long after process start a startup step finished."""
+    with _timings_lock:
+        _timings.append((label, "at", time.perf_counter() - _process_start))
+
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access.
+
+    Provider modules pull in Playwright, googleapiclient, BeautifulSoup and friends; deferring them
+    keeps those imports off the startup path, and the first background job that needs one pays for it.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                start = time.perf_counter()
+                self._module = importlib.import_module(self._name)
+                record(f"import {self._name}", time.perf_counter() - start)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._module or self._load(), attr)
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def report(title: str = "Startup profile"):
+    with _timings_lock:
+        timings = list(_timings)
+    print(f"[startup] {title}:")
+    for label, kind, seconds in timings:
+        print(f"[startup]   {label:<40} {kind:>4} {seconds * 1000:8.1f} ms")
+
+
+def first_request_served():
+    """Reports the full profile once, when the first request has been handled."""
+    global _first_request_reported
+    if _first_request_reported:
+        return
+    _first_request_reported = True
+    mark("first request served")
+    report()
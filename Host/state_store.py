@@ -0,0 +1,89 @@
+# state_store.py - Dashboard state with lock-free reads and debounced, atomic persistence
+import atexit
+import json
+import os
+import threading
+import time
+
+
+class StateStore:
+    """Holds the dashboard state dict and persists it to a JSON file.
+
+    Writers replace the whole dict under a lock, so readers never need one. Saves run on a
+    background thread, coalescing bursts within debounce_seconds into one atomic write.
+    """
+
+    def __init__(self, path: str, defaults: dict, debounce_seconds: float = 2.0, on_change=None):
+        self.path = path
+        self.debounce_seconds = debounce_seconds
+        self.on_change = on_change
+        self.version = 0
+        self.updated_at = os.path.getmtime(path) if os.path.exists(path) else None
+        self._data = self._load(defaults)
+        self._update_lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._dirty = threading.Event()
+        threading.Thread(target=self._writer_loop, name="state-writer", daemon=True).start()
+        atexit.register(self.flush)
+
+    def _load(self, defaults: dict) -> dict:
+        data = dict(defaults)
+        if os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    loaded_state = json.load(f)
+                for key, default_value in defaults.items():
+                    data[key] = loaded_state.get(key, default_value)
+            except Exception as e:
+                print(f"[State Error] Failed to load {self.path}: {e}")
+        return data
+
+    def snapshot(self) -> dict:
+        """The current state. Treat it as read-only; use update() to change anything."""
+        return self._data
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        self.update({key: value})
+
+    def update(self, changes: dict):
+        """Applies all changes as one new version and schedules a save."""
+        with self._update_lock:
+            new_data = dict(self._data)
+            new_data.update(changes)
+            self._data = new_data
+            self.version += 1
+            self.updated_at = time.time()
+        self._dirty.set()
+        if self.on_change:
+            self.on_change()
+
+    def flush(self):
+        """Writes pending changes immediately (used at exit)."""
+        if self._dirty.is_set():
+            self._dirty.clear()
+            self._write(self._data)
+
+    def _writer_loop(self):
+        while True:
+            self._dirty.wait()
+            time.sleep(self.debounce_seconds)
+            self._dirty.clear()
+            self._write(self._data)
+
+    def _write(self, data: dict):
+        tmp_path = f"{self.path}.tmp"
+        with self._file_lock:
+            try:
+                with open(tmp_path, "w") as f:
+                    json.dump(data, f, separators=(",", ":"))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"[State Error] Failed to save {self.path}: {e}")
@@ -1,22 +1,26 @@
 # weather.py
-import requests
+import os
 from datetime import datetime
 
+import http_client
+
 LAT, LON = 41.8781, -87.6298
+# Overridable so the dashboard can run against fake_upstream.py
+FORECAST_URL = os.environ.get("OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
 
 def get_chicago_weekly():
     """
     Returns a list of 7 days, each with (date, max, min, code, icon, desc, uv_index_max, snow_sum).
     """
     url = (
-        f"https://api.open-meteo.com/v1/forecast"
+        f"{FORECAST_URL}"
         f"?latitude={LAT}&longitude={LON}"
         "&daily=temperature_2m_max,temperature_2m_min,weathercode,uv_index_max,snowfall_sum" # Added snowfall_sum
         "&temperature_unit=fahrenheit"
         "&precipitation_unit=inch" # Ensure snow comes in inches
         "&timezone=America/Chicago"
     )
-    r = requests.get(url, timeout=10) # Increased timeout slightly
+    r = http_client.get(url, timeout=10) # Increased timeout slightly
     r.raise_for_status()
     data = r.json()
     days = data['daily']['time']